@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import contextlib
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for carpeta in ('regex_downloader', 'storage_manager'):
+    sys.path.insert(0, os.path.join(RAIZ, carpeta))
+
+import download_mseed  # noqa: E402
+import download_txt  # noqa: E402
+import directory_reader  # noqa: E402
+import move_out_folder  # noqa: E402
+import rename_txt  # noqa: E402
+from sftp_stub import ServidorSFTPLocal  # noqa: E402
+
+ARCHIVO_REMOTO = '/home/sysop/seiscomp/var/lib/archive'
+EVENTOS_REMOTO = '/var/www/html/sensor/events'
+
+
+def _proc_io():
+    """Contadores de syscalls de lectura/escritura del proceso (solo Linux)."""
+    try:
+        with open('/proc/self/io') as f:
+            campos = dict(linea.split(': ') for linea in f.read().splitlines())
+        return int(campos['syscr']), int(campos['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _tamano_arbol(ruta):
+    archivos, total = 0, 0
+    for root, _, files in os.walk(ruta):
+        for file in files:
+            archivos += 1
+            total += os.path.getsize(os.path.join(root, file))
+    return archivos, total
+
+
+def medir(nombre, funcion, contar):
+    """Ejecuta funcion y devuelve archivos/s, MB/s y syscalls de E/S.
+
+    contar() se llama al terminar y devuelve (archivos, bytes) procesados.
+    Las syscalls incluyen las del servidor SFTP, que corre en el mismo proceso.
+    """
+    io_inicio = _proc_io()
+    inicio = perf_counter()
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        funcion()
+    segundos = perf_counter() - inicio
+    io_fin = _proc_io()
+
+    archivos, total = contar()
+    resultado = {
+        'benchmark': nombre, 'segundos': round(segundos, 4), 'archivos': archivos,
+        'archivos_s': round(archivos / segundos, 1) if segundos else None,
+        'mb_s': round(total / 1024 ** 2 / segundos, 2) if segundos else None,
+    }
+    if io_inicio and io_fin:
+        resultado['syscalls_lectura'] = io_fin[0] - io_inicio[0]
+        resultado['syscalls_escritura'] = io_fin[1] - io_inicio[1]
+    print(' '.join(f"{k}={v}" for k, v in resultado.items()))
+    return resultado
+
+
+def generar_archivo_seiscomp(raiz, inicio, dias, tamano_kb):
+    """Árbol {año}/{red}/{estación}/{canal}.D con un archivo por día y canal.
+
+    El contenido es aleatorio: los descargadores solo copian bytes.
+    """
+    bloque = os.urandom(tamano_kb * 1024)
+    for d in range(dias):
+        fecha = inicio + timedelta(days=d)
+        year, jday = fecha.year, fecha.timetuple().tm_yday
+        for net, sta, loc, model in download_mseed.STATIONS:
+            for ori in download_mseed.ORIENTATION:
+                carpeta = os.path.join(raiz, ARCHIVO_REMOTO.lstrip('/'), str(year), net, sta, f"{model}{ori}.D")
+                os.makedirs(carpeta, exist_ok=True)
+                with open(os.path.join(carpeta, f"{net}.{sta}.{loc}.{model}{ori}.D.{year}.{jday:03d}"), 'wb') as f:
+                    f.write(bloque)
+
+
+def _registro_txt(fecha, muestras):
+    cabecera = [f"# CAMPO {i}: valor" for i in range(1, 20)]
+    cabecera.append(f"# HORA INICIO (UTC-0): {fecha:%Y-%m-%dT%H:%M:%S}")
+    return "\n".join(cabecera) + "\n" + "0.000 0.000 0.000\n" * muestras
+
+
+def generar_eventos(raiz, eventos, archivos_por_evento, muestras, network_code='RA'):
+    """Carpetas de eventos con registros RED_{red}_*.txt como los del servidor web."""
+    inicio = datetime(2024, 1, 1)
+    for e in range(eventos):
+        fecha = inicio + timedelta(hours=e)
+        carpeta = os.path.join(raiz, f"{fecha:%Y%m%d_%H%M%S}")
+        os.makedirs(carpeta, exist_ok=True)
+        for k in range(archivos_por_evento):
+            with open(os.path.join(carpeta, f"RED_{network_code}_EST{k:02d}.txt"), 'w', encoding='utf-8') as f:
+                f.write(_registro_txt(fecha, muestras))
+
+
+def run(args):
+    resultados = []
+    trabajo = tempfile.mkdtemp(prefix='bench_')
+    try:
+        servidor_raiz = os.path.join(trabajo, 'servidor')
+        eventos_raiz = os.path.join(servidor_raiz, EVENTOS_REMOTO.lstrip('/'))
+        inicio = datetime(2024, 1, 1)
+        generar_archivo_seiscomp(servidor_raiz, inicio, args.days, args.mseed_kb)
+        generar_eventos(eventos_raiz, args.events, args.files_per_event, args.samples)
+
+        with ServidorSFTPLocal(servidor_raiz, prefijos=[EVENTOS_REMOTO]) as servidor:
+            ssh = servidor.connect()
+            sftp = ssh.open_sftp()
+
+            destino = os.path.join(trabajo, 'mseed')
+            resultados.append(medir(
+                'download_mseed.download_files',
+                lambda: download_mseed.download_files(sftp, destino, inicio, inicio + timedelta(days=args.days - 1)),
+                lambda: _tamano_arbol(destino)))
+
+            carpetas = sorted(os.path.join(EVENTOS_REMOTO, c) for c in os.listdir(eventos_raiz))
+            encontrados = []
+            resultados.append(medir(
+                'download_txt.get_txt_files',
+                lambda: [encontrados.extend(download_txt.get_txt_files(ssh, c, 'RA')) for c in carpetas],
+                lambda: (len(encontrados), 0)))
+
+            if shutil.which('scp'):
+                destino_txt = os.path.join(trabajo, 'txt_scp')
+                download_txt.remote_base_path = EVENTOS_REMOTO  # global que define su __main__
+                resultados.append(medir(
+                    'download_txt.download_files',
+                    lambda: download_txt.download_files(ssh, encontrados, destino_txt),
+                    lambda: _tamano_arbol(destino_txt)))
+            else:
+                print("scp no está instalado: se omite download_txt.download_files")
+
+            sftp.close()
+            ssh.close()
+
+        # Herramientas locales sobre una copia del árbol de eventos
+        local = os.path.join(trabajo, 'eventos')
+        shutil.copytree(eventos_raiz, local)
+        for i in range(args.tree_copies - 1):
+            shutil.copytree(eventos_raiz, os.path.join(local, f"copia_{i}"))
+
+        resultados.append(medir(
+            'directory_reader.generate_directory_csv',
+            lambda: directory_reader.generate_directory_csv(local, os.path.join(trabajo, 'arbol.csv')),
+            lambda: _tamano_arbol(local)))
+        resultados.append(medir(
+            'rename_txt.rename_txt',
+            lambda: rename_txt.rename_txt(local, 'RA', max_workers=args.workers),
+            lambda: _tamano_arbol(local)))
+        resultados.append(medir(
+            'move_out_folder.move_files',
+            lambda: move_out_folder.move_files(local),
+            lambda: _tamano_arbol(local)))
+    finally:
+        if args.keep:
+            print(f"Datos conservados en {trabajo}")
+        else:
+            shutil.rmtree(trabajo, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=1)
+    return resultados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Mide descargadores y herramientas de almacenamiento contra un servidor SFTP local.')
+    parser.add_argument('--days', type=int, default=3, help='Días de miniSEED sintéticos (default: 3)')
+    parser.add_argument('--mseed-kb', type=int, default=256, help='Tamaño de cada archivo de día en KB (default: 256)')
+    parser.add_argument('--events', type=int, default=50, help='Carpetas de eventos (default: 50)')
+    parser.add_argument('--files-per-event', type=int, default=10, help='Registros .txt por evento (default: 10)')
+    parser.add_argument('--samples', type=int, default=2000, help='Muestras por registro .txt (default: 2000)')
+    parser.add_argument('--tree-copies', type=int, default=4,
+                        help='Copias del árbol de eventos para las pruebas locales (default: 4)')
+    parser.add_argument('--workers', type=int, default=8, help='Hilos para rename_txt (default: 8)')
+    parser.add_argument('--json', help='Guardar los resultados en este archivo JSON')
+    parser.add_argument('--keep', action='store_true', help='No borrar los datos generados')
+    run(parser.parse_args())
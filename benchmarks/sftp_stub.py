@@ -0,0 +1,191 @@
+import os
+import socket
+import posixpath
+import threading
+import subprocess
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface, ServerInterface
+
+
+class _Handle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+
+class _SFTP(SFTPServerInterface):
+    """SFTP de solo lo necesario para los descargadores, con raíz en una carpeta local."""
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = server.stub.root
+
+    def canonicalize(self, path):
+        return posixpath.normpath(posixpath.join('/', path))
+
+    def _local(self, path):
+        return os.path.join(self.root, self.canonicalize(path).lstrip('/'))
+
+    def list_folder(self, path):
+        try:
+            resultado = []
+            with os.scandir(self._local(path)) as entries:
+                for entry in entries:
+                    attr = SFTPAttributes.from_stat(entry.stat())
+                    attr.filename = entry.name
+                    resultado.append(attr)
+            return resultado
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(self._local(path)))
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self._local(path), flags | getattr(os, 'O_BINARY', 0), 0o666)
+        except OSError as e:
+            return SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            modo = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            modo = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            modo = 'rb'
+        handle = _Handle(flags)
+        handle.filename = self._local(path)
+        handle.readfile = handle.writefile = os.fdopen(fd, modo)
+        return handle
+
+
+class _Servidor(ServerInterface):
+    """Acepta cualquier usuario/contraseña y las sesiones con exec o sftp."""
+
+    def __init__(self, stub):
+        self.stub = stub
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.stub._exec, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+class ServidorSFTPLocal:
+    """Servidor SSH/SFTP en proceso que sirve una carpeta local como '/'.
+
+    Los comandos exec (find, scp) se ejecutan localmente; las rutas que
+    empiezan con alguno de los prefijos remotos se traducen a la carpeta
+    local y la salida se traduce de vuelta.
+    """
+
+    def __init__(self, root, prefijos=(), host='127.0.0.1'):
+        self.root = os.path.abspath(root)
+        self.prefijos = sorted(prefijos, key=len, reverse=True)
+        self.host = host
+        self.port = None
+        self._detener = threading.Event()
+        self._transportes = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._aceptar, daemon=True).start()
+
+    def _aceptar(self):
+        while not self._detener.is_set():
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            transporte = paramiko.Transport(conn)
+            transporte.add_server_key(self.host_key)
+            transporte.set_subsystem_handler('sftp', SFTPServer, _SFTP)
+            transporte.start_server(server=_Servidor(self))
+            self._transportes.append(transporte)
+
+    def stop(self):
+        self._detener.set()
+        self.sock.close()
+        for transporte in self._transportes:
+            transporte.close()
+
+    def connect(self):
+        """Cliente SSH ya conectado a este servidor."""
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(self.host, port=self.port, username='sysop', password='bench',
+                    look_for_keys=False, allow_agent=False)
+        return ssh
+
+    def _a_local(self, command):
+        for prefijo in self.prefijos:
+            command = command.replace(prefijo, os.path.join(self.root, prefijo.lstrip('/')))
+        return command
+
+    def _exec(self, channel, command):
+        local = self._a_local(command)
+        try:
+            if command.lstrip().startswith('scp'):
+                # scp es interactivo (confirmaciones), los datos se bombean en ambos sentidos
+                proc = subprocess.Popen(local, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+                def entrada():
+                    try:
+                        while True:
+                            datos = channel.recv(65536)
+                            if not datos:
+                                break
+                            proc.stdin.write(datos)
+                            proc.stdin.flush()
+                        proc.stdin.close()
+                    except (OSError, ValueError):
+                        pass
+
+                threading.Thread(target=entrada, daemon=True).start()
+                while True:
+                    datos = os.read(proc.stdout.fileno(), 65536)
+                    if not datos:
+                        break
+                    channel.sendall(datos)
+                codigo = proc.wait()
+            else:
+                resultado = subprocess.run(local, shell=True, capture_output=True)
+                channel.sendall(resultado.stdout.replace(self.root.encode(), b''))
+                channel.sendall_stderr(resultado.stderr)
+                codigo = resultado.returncode
+            channel.send_exit_status(codigo)
+        finally:
+            channel.close()
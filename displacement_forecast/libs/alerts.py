@@ -0,0 +1,229 @@
+import io
+import os
+import json
+import hashlib
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+NANOSECONDS_PER_DAY = 86400e9
+# Bytes hashed at each end of the consumed part of a CSV to detect rewrites
+FINGERPRINT_BYTES = 64 * 1024
+
+
+@dataclass
+class Alert:
+    """Threshold crossing of one series."""
+
+    structure: str
+    series: str
+    date: str
+    kind: str
+    value: float
+    threshold: float
+    failure_date: Optional[str] = None
+
+
+class PrismState:
+    """Rolling state of one series, updated in O(1) per new reading.
+
+    Velocity is the displacement change over the last ``window`` readings
+    (cm/day), acceleration the change between consecutive velocities
+    (cm/day²) and the inverse velocity is extrapolated linearly to zero to
+    estimate the failure time (Fukuzono's method).
+    """
+
+    def __init__(self, window: int):
+        self.points = deque(maxlen=window + 1)
+        self.velocity = None
+        self.acceleration = None
+        self.inverse_velocity = None
+        self.failure_time = None
+        self.last_time = None
+        self.active = []
+
+    def update(self, t: float, value: float) -> None:
+        self.points.append((t, value))
+        if len(self.points) < self.points.maxlen:
+            return
+
+        t0, v0 = self.points[0]
+        if t <= t0:
+            return
+        velocity = (value - v0) / (t - t0)
+
+        self.acceleration = None
+        self.failure_time = None
+        if self.velocity is not None and t > self.last_time:
+            self.acceleration = (velocity - self.velocity) / (t - self.last_time)
+
+        inverse_velocity = 1 / velocity if velocity > 0 else None
+        if inverse_velocity is not None and self.inverse_velocity is not None and t > self.last_time:
+            slope = (inverse_velocity - self.inverse_velocity) / (t - self.last_time)
+            # Solo una velocidad inversa decreciente apunta a una falla
+            if slope < 0:
+                self.failure_time = t - inverse_velocity / slope
+
+        self.velocity, self.inverse_velocity, self.last_time = velocity, inverse_velocity, t
+
+    def to_dict(self) -> Dict:
+        return {
+            "points": list(self.points), "velocity": self.velocity,
+            "acceleration": self.acceleration, "inverse_velocity": self.inverse_velocity,
+            "failure_time": self.failure_time, "last_time": self.last_time, "active": self.active,
+        }
+
+    @classmethod
+    def from_dict(cls, window: int, data: Dict) -> "PrismState":
+        state = cls(window)
+        state.points.extend(tuple(p) for p in data["points"])
+        for key in ("velocity", "acceleration", "inverse_velocity", "failure_time", "last_time", "active"):
+            setattr(state, key, data[key])
+        return state
+
+
+def _fingerprint(file, offset: int) -> str:
+    """Hash of the first and last consumed bytes of an open file."""
+    digest = hashlib.blake2b(digest_size=16)
+    file.seek(0)
+    digest.update(file.read(min(offset, FINGERPRINT_BYTES)))
+    start = max(0, offset - FINGERPRINT_BYTES)
+    file.seek(start)
+    digest.update(file.read(offset - start))
+    return digest.hexdigest()
+
+
+def _to_date(t: Optional[float]) -> Optional[str]:
+    if t is None:
+        return None
+    return pd.Timestamp(int(t * NANOSECONDS_PER_DAY)).isoformat()
+
+
+class AlertEngine:
+    """Streaming velocity/acceleration alerts over the structure CSV files.
+
+    Only the bytes appended since the previous call are parsed, and the
+    rolling state of every series is persisted in ``state_path`` so a new
+    run does not replay the history. A file that was replaced (new inode),
+    truncated or edited inside the consumed part (fingerprint mismatch) is
+    read again from the header with fresh state.
+    """
+
+    def __init__(self, state_path: str, window: int, velocity_threshold: float,
+                 acceleration_threshold: float):
+        self.state_path = state_path
+        self.window = window
+        self.velocity_threshold = velocity_threshold
+        self.acceleration_threshold = acceleration_threshold
+        self.structures = {}
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as file:
+                saved = json.load(file)
+            # Un cambio de ventana invalida el estado guardado
+            if saved.get("window") == window:
+                self.structures = saved["structures"]
+        self._prisms: Dict[str, Dict[str, PrismState]] = {}
+
+    def _structure_state(self, structure: str) -> Dict:
+        state = self.structures.setdefault(
+            structure, {"offset": 0, "inode": None, "fingerprint": None, "columns": None, "prisms": {}}
+        )
+        if structure not in self._prisms:
+            self._prisms[structure] = {
+                name: PrismState.from_dict(self.window, data) for name, data in state["prisms"].items()
+            }
+        return state
+
+    def _read_new_rows(self, structure: str, state: Dict, file_path: str,
+                       separator: str) -> Optional[pd.DataFrame]:
+        stat = os.stat(file_path)
+        with open(file_path, "rb") as file:
+            rewritten = (
+                state["columns"] is None
+                or stat.st_size < state["offset"]
+                or state.get("inode") != stat.st_ino
+                or state.get("fingerprint") != _fingerprint(file, state["offset"])
+            )
+            if rewritten:
+                # Archivo nuevo o reescrito: empezar desde el encabezado
+                file.seek(0)
+                header = file.readline()
+                state.update(columns=header.decode("utf-8-sig").strip().split(separator),
+                             offset=file.tell(), prisms={})
+                self._prisms[structure] = {}
+            file.seek(state["offset"])
+            data = file.read()
+
+            # Solo se consumen líneas completas; el resto se lee en la próxima llamada
+            end = data.rfind(b"\n") + 1
+            state["offset"] += end
+            state["inode"] = stat.st_ino
+            state["fingerprint"] = _fingerprint(file, state["offset"])
+
+        if end == 0:
+            return None
+        return pd.read_csv(io.BytesIO(data[:end]), sep=separator, header=None,
+                           names=state["columns"])
+
+    def ingest(self, structure: str, file_path: str, date_col: str = "date",
+               separator: str = ";") -> List[Alert]:
+        """Process the rows appended to a structure CSV and return new alerts."""
+        state = self._structure_state(structure)
+        rows = self._read_new_rows(structure, state, file_path, separator)
+        if rows is None or rows.empty:
+            return []
+
+        prisms = self._prisms[structure]
+        columns = [c for c in rows.columns if c != date_col and not c.endswith("_VER")]
+        times = pd.to_datetime(rows[date_col], dayfirst=True).to_numpy("datetime64[ns]")
+        times = times.astype(np.int64) / NANOSECONDS_PER_DAY
+        values = rows[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+        alerts = []
+        for j, column in enumerate(columns):
+            prism = prisms.setdefault(column, PrismState(self.window))
+            for t, value in zip(times, values[:, j]):
+                if np.isnan(value):
+                    continue
+                prism.update(float(t), float(value))
+                alerts.extend(self._check(structure, column, prism))
+
+        alerts.sort(key=lambda alert: alert.date)
+        return alerts
+
+    def _check(self, structure: str, column: str, prism: PrismState) -> List[Alert]:
+        """Alerts for the thresholds crossed by the last update (raised once per crossing)."""
+        exceeded = {}
+        if prism.velocity is not None and prism.velocity > self.velocity_threshold:
+            exceeded["velocity"] = (prism.velocity, self.velocity_threshold)
+        if prism.acceleration is not None and prism.acceleration > self.acceleration_threshold:
+            exceeded["acceleration"] = (prism.acceleration, self.acceleration_threshold)
+
+        alerts = [
+            Alert(structure, column, _to_date(prism.last_time), kind, value, threshold,
+                  _to_date(prism.failure_time))
+            for kind, (value, threshold) in exceeded.items() if kind not in prism.active
+        ]
+        prism.active = list(exceeded)
+        return alerts
+
+    def save(self) -> None:
+        """Persist the rolling state of every series."""
+        for structure, prisms in self._prisms.items():
+            self.structures[structure]["prisms"] = {name: p.to_dict() for name, p in prisms.items()}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"window": self.window, "structures": self.structures}, file)
+        os.replace(tmp_path, self.state_path)
+
+
+def append_alerts(alerts: List[Alert], file_path: str) -> None:
+    """Append alerts to a CSV file, writing the header only once."""
+    if not alerts:
+        return
+    pd.DataFrame([asdict(a) for a in alerts]).to_csv(
+        file_path, mode="a", index=False, sep=";", header=not os.path.exists(file_path)
+    )
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+from prophet import Prophet
+
+# Same specification as TimeSeriesAnalyzer._forecast_sarima
+SARIMA_ORDER = (1, 1, 1)
+SARIMA_SEASONAL_ORDER = (1, 1, 1, 12)
+MODELS = ("SARIMA", "Prophet")
+
+
+def _origins(n: int, min_train: int, step: int) -> range:
+    return range(min_train, n, step)
+
+
+def _rows(column: str, model: str, origin: int, dates, actual, mean, lower, upper) -> List[Dict]:
+    return [
+        {"series": column, "model": model, "origin": origin, "step": k + 1, "date": dates[k],
+         "actual": actual[k], "forecast": mean[k], "lower": lower[k], "upper": upper[k]}
+        for k in range(len(actual))
+    ]
+
+
+def backtest_sarima(df: pd.DataFrame, column: str, horizon: int, min_train: int,
+                    step: int = 1) -> List[Dict]:
+    """Rolling-origin SARIMA forecasts with a single fit.
+
+    The model is fitted once on the first ``min_train`` observations. Every
+    later origin reuses those parameters through ``results.apply``, which
+    only runs the Kalman filter over the longer history.
+    """
+    y = df[column].to_numpy(dtype=float)
+    dates = df["date"].to_numpy()
+    results = SARIMAX(
+        y[:min_train], order=SARIMA_ORDER, seasonal_order=SARIMA_SEASONAL_ORDER
+    ).fit(disp=False)
+
+    rows = []
+    for origin in _origins(len(y), min_train, step):
+        res = results if origin == min_train else results.apply(y[:origin])
+        h = min(horizon, len(y) - origin)
+        forecast = res.get_forecast(steps=h)
+        ci = np.asarray(forecast.conf_int(alpha=0.05))
+        rows.extend(_rows(column, "SARIMA", origin, dates[origin:origin + h], y[origin:origin + h],
+                          np.asarray(forecast.predicted_mean), ci[:, 0], ci[:, 1]))
+    return rows
+
+
+def _n_changepoints(n: int, n_changepoints: int = 25, changepoint_range: float = 0.8) -> int:
+    # Same reduction Prophet applies to short histories
+    return min(n_changepoints, int(np.floor(n * changepoint_range)) - 1)
+
+
+def _warm_start_params(model: Prophet) -> Dict:
+    """Fitted parameters of a Prophet model, used to initialise the next fit."""
+    return {
+        "k": model.params["k"][0][0],
+        "m": model.params["m"][0][0],
+        "sigma_obs": model.params["sigma_obs"][0][0],
+        "delta": model.params["delta"][0],
+        "beta": model.params["beta"][0],
+    }
+
+
+def backtest_prophet(df: pd.DataFrame, column: str, horizon: int, min_train: int,
+                     step: int = 1) -> List[Dict]:
+    """Rolling-origin Prophet forecasts.
+
+    Prophet has no filtering update, so each origin is refitted, but the
+    optimiser starts from the previous origin's parameters (warm start).
+    """
+    data = df.rename(columns={"date": "ds", column: "y"})[["ds", "y"]].reset_index(drop=True)
+    previous, previous_origin = None, None
+
+    rows = []
+    for origin in _origins(len(data), min_train, step):
+        model = Prophet(yearly_seasonality=True, interval_width=0.95, changepoint_prior_scale=0.05)
+        kwargs = {}
+        if previous is not None and _n_changepoints(origin) == _n_changepoints(previous_origin):
+            kwargs["init"] = _warm_start_params(previous)
+        model.fit(data.iloc[:origin], **kwargs)
+
+        h = min(horizon, len(data) - origin)
+        future = data.iloc[origin:origin + h]
+        forecast = model.predict(future[["ds"]])
+        rows.extend(_rows(column, "Prophet", origin, future["ds"].to_numpy(), future["y"].to_numpy(),
+                          forecast["yhat"].to_numpy(), forecast["yhat_lower"].to_numpy(),
+                          forecast["yhat_upper"].to_numpy()))
+        previous, previous_origin = model, origin
+    return rows
+
+
+_BACKTESTS = {"SARIMA": backtest_sarima, "Prophet": backtest_prophet}
+
+
+def backtest_series(task: Tuple) -> List[Dict]:
+    """Backtest one series with every requested model (runs in a worker process)."""
+    df, column, models, horizon, min_train, step = task
+    rows = []
+    for model in models:
+        try:
+            rows.extend(_BACKTESTS[model](df, column, horizon, min_train, step))
+        except Exception as e:
+            print(f"Advertencia: backtest {model} de '{column}' falló: {e}")
+    return rows
+
+
+def summarize(detail: pd.DataFrame, by: Iterable[str] = ("model",)) -> pd.DataFrame:
+    """MAE, RMSE and 95% interval coverage grouped by ``by``."""
+    detail = detail.assign(
+        error=detail["forecast"] - detail["actual"],
+        covered=(detail["actual"] >= detail["lower"]) & (detail["actual"] <= detail["upper"]),
+    )
+    return (
+        detail.groupby(list(by))
+        .agg(n=("error", "size"), mae=("error", lambda e: e.abs().mean()),
+             rmse=("error", lambda e: np.sqrt((e ** 2).mean())), coverage=("covered", "mean"))
+        .reset_index()
+    )
+
+
+def run_backtest(series_dfs: List[pd.DataFrame], horizon: int, min_train: int = 36, step: int = 1,
+                 models: Iterable[str] = MODELS, max_workers: int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Rolling-origin backtest of every series, in parallel across series.
+
+    Parameters
+    ----------
+    series_dfs : list of pd.DataFrame
+        Two-column frames (date, value) as in ``TimeSeriesData.series_dfs``.
+    horizon : int
+        Maximum number of steps forecast from each origin.
+    min_train : int, optional
+        Observations used for the first fit, by default 36.
+    step : int, optional
+        Distance between consecutive origins, by default 1.
+    models : iterable of str, optional
+        Models to evaluate, by default SARIMA and Prophet.
+    max_workers : int, optional
+        Worker processes, by default one per CPU.
+
+    Returns
+    -------
+    tuple of pd.DataFrame
+        Per-forecast detail and the summary per model.
+    """
+    models = tuple(models)
+    tasks = [
+        (df.reset_index(drop=True), df.columns[1], models, horizon, min_train, step)
+        for df in series_dfs if len(df) > min_train
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rows = [row for result in executor.map(backtest_series, tasks) for row in result]
+
+    detail = pd.DataFrame(rows, columns=["series", "model", "origin", "step", "date", "actual",
+                                         "forecast", "lower", "upper"])
+    return detail, summarize(detail)
@@ -0,0 +1,121 @@
+import warnings
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import List
+
+
+@dataclass
+class Decomposition:
+    """Additive decomposition of every series of a structure.
+
+    Each component is a wide DataFrame indexed by date with one column per
+    series, so ``decomposition.resid[column].dropna()`` can be fed directly
+    to a stationarity test.
+    """
+
+    observed: pd.DataFrame
+    trend: pd.DataFrame
+    seasonal: pd.DataFrame
+    resid: pd.DataFrame
+    period: int
+
+    def component(self, column: str) -> pd.DataFrame:
+        """Return the four components of a single series on its own dates."""
+        frame = pd.DataFrame({
+            "observed": self.observed[column],
+            "trend": self.trend[column],
+            "seasonal": self.seasonal[column],
+            "resid": self.resid[column],
+        })
+        return frame[frame["observed"].notna()]
+
+
+def align_series(df: pd.DataFrame, columns: List[str], date_col: str = "date") -> pd.DataFrame:
+    """Align the series of a structure on its common date index.
+
+    Rows with the same date are averaged; missing readings stay as NaN.
+    """
+    wide = df.set_index(date_col)[columns].apply(pd.to_numeric, errors="coerce")
+    if wide.index.has_duplicates:
+        wide = wide.groupby(level=0, sort=False).mean()
+    return wide
+
+
+def _trend_filter(period: int) -> np.ndarray:
+    # Same centered moving average as statsmodels.seasonal_decompose
+    if period % 2 == 0:
+        return np.r_[0.5, np.ones(period - 1), 0.5] / period
+    return np.ones(period) / period
+
+
+def moving_average(values: np.ndarray, period: int) -> np.ndarray:
+    """Centered moving average along axis 0 of a 2-D array.
+
+    A window containing any NaN yields NaN, so gaps and the series ends
+    behave as in ``seasonal_decompose`` with ``extrapolate_trend=0``.
+    """
+    weights = _trend_filter(period)
+    n, half = len(values), len(weights) // 2
+    trend = np.full(values.shape, np.nan)
+    if n < len(weights):
+        return trend
+
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    # Sliding windows of shape (n - len(weights) + 1, columns, len(weights))
+    windows = np.lib.stride_tricks.sliding_window_view(filled, len(weights), axis=0)
+    counts = np.lib.stride_tricks.sliding_window_view(valid, len(weights), axis=0).sum(axis=-1)
+    smoothed = windows @ weights
+    trend[half:n - half] = np.where(counts == len(weights), smoothed, np.nan)
+    return trend
+
+
+def seasonal_decompose_2d(wide: pd.DataFrame, period: int = 6) -> Decomposition:
+    """Additive seasonal decomposition of all columns in one pass.
+
+    Equivalent to calling ``seasonal_decompose(ts, model="additive",
+    period=period)`` on each gap-free series. The seasonal phase is taken
+    from the position in the common index, so series that start later
+    keep the same phases as the rest of the structure.
+
+    Parameters
+    ----------
+    wide : pd.DataFrame
+        Series aligned on a date index (see ``align_series``).
+    period : int, optional
+        Seasonal period in samples, by default 6.
+
+    Returns
+    -------
+    Decomposition
+        Observed, trend, seasonal and residual components.
+    """
+    values = wide.to_numpy(dtype=float)
+    trend = moving_average(values, period)
+    detrended = values - trend
+
+    # NaN-aware mean of the detrended values for every phase and column
+    n, m = values.shape
+    phase = np.arange(n) % period
+    valid = ~np.isnan(detrended)
+    sums = np.zeros((period, m))
+    counts = np.zeros((period, m))
+    np.add.at(sums, phase, np.where(valid, detrended, 0.0))
+    np.add.at(counts, phase, valid)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        phase_means = sums / counts
+        phase_means -= np.nanmean(phase_means, axis=0)
+
+    seasonal = phase_means[phase]
+    # Only dates with an observation carry components
+    seasonal[np.isnan(values)] = np.nan
+    resid = values - trend - seasonal
+
+    def frame(array):
+        return pd.DataFrame(array, index=wide.index, columns=wide.columns)
+
+    return Decomposition(
+        observed=wide, trend=frame(trend), seasonal=frame(seasonal), resid=frame(resid), period=period
+    )
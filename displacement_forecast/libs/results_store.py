@@ -0,0 +1,181 @@
+import sqlite3
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    structure TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    forecast_horizon INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS series_results (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    structure TEXT NOT NULL,
+    series TEXT NOT NULL,
+    model_type TEXT NOT NULL,
+    is_stationary INTEGER NOT NULL,
+    adf_statistic REAL,
+    p_value REAL,
+    lags_used INTEGER,
+    nobs INTEGER,
+    critical_1 REAL,
+    critical_5 REAL,
+    critical_10 REAL,
+    last_observed REAL,
+    max_forecast REAL,
+    PRIMARY KEY (run_id, series)
+);
+CREATE TABLE IF NOT EXISTS forecasts (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    series TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    mean REAL,
+    lower REAL,
+    upper REAL,
+    PRIMARY KEY (run_id, series, step)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_structure ON runs(structure, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_max ON series_results(max_forecast DESC);
+CREATE INDEX IF NOT EXISTS idx_results_structure ON series_results(structure, series);
+"""
+
+
+class ResultsStore:
+    """SQLite store for the stationarity tests and forecasts of every series.
+
+    Results are buffered per structure and written in a single transaction
+    by ``flush``, which also marks the run as completed. Queries only read
+    the latest completed run of each structure, so a run that failed
+    halfway does not hide the previous one.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self._results: List[tuple] = []
+        self._forecasts: List[tuple] = []
+        self._open_runs: List[int] = []
+
+    def _migrate(self) -> None:
+        """Add the ``completed`` flag to stores created before it existed."""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(runs)")]
+        if "completed" in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE runs ADD COLUMN completed INTEGER NOT NULL DEFAULT 0")
+            # Las corridas anteriores con resultados se consideran completas
+            self.conn.execute(
+                "UPDATE runs SET completed = EXISTS "
+                "(SELECT 1 FROM series_results r WHERE r.run_id = runs.run_id)"
+            )
+
+    def start_run(self, structure: str, forecast_horizon: int) -> int:
+        """Register a new, not yet completed analysis run and return its id.
+
+        Results still buffered from a run that was never flushed are dropped.
+        """
+        self._results.clear()
+        self._forecasts.clear()
+        self._open_runs.clear()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (structure, created_at, forecast_horizon, completed) VALUES (?, ?, ?, 0)",
+                (structure, datetime.now().isoformat(timespec="seconds"), forecast_horizon),
+            )
+        self._open_runs.append(cursor.lastrowid)
+        return cursor.lastrowid
+
+    def add_result(self, run_id: int, structure: str, series: str, model_type: str,
+                   is_stationary: bool, adf_output: pd.Series, last_observed: float,
+                   max_forecast: float, dates: Iterable, mean: Iterable, lower: Iterable,
+                   upper: Iterable) -> None:
+        """Buffer the result of one series; nothing is written until ``flush``."""
+        self._results.append((
+            run_id, structure, series, model_type, int(bool(is_stationary)),
+            float(adf_output["Test Statistic"]), float(adf_output["p-value"]),
+            int(adf_output["No. of Lags used"]), int(adf_output["Number of observations used"]),
+            float(adf_output["Critical Value (1%)"]), float(adf_output["Critical Value (5%)"]),
+            float(adf_output["Critical Value (10%)"]), float(last_observed), float(max_forecast),
+        ))
+        for step, (date, m, lo, up) in enumerate(zip(dates, mean, lower, upper), start=1):
+            self._forecasts.append(
+                (run_id, series, step, pd.Timestamp(date).isoformat(), float(m), float(lo), float(up))
+            )
+
+    def flush(self) -> None:
+        """Write the buffered results and mark the open runs completed in one transaction."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO series_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._results,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)", self._forecasts
+            )
+            self.conn.executemany(
+                "UPDATE runs SET completed = 1 WHERE run_id = ?", [(r,) for r in self._open_runs]
+            )
+        self._results.clear()
+        self._forecasts.clear()
+        self._open_runs.clear()
+
+    def top_series(self, n: int = 10, structures: Optional[List[str]] = None,
+                   suffix: Optional[str] = None) -> pd.DataFrame:
+        """Series with the largest forecasted displacement across structures.
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of rows to return, by default 10.
+        structures : list of str, optional
+            Restrict the ranking to these structures, by default all.
+        suffix : str, optional
+            Only series whose name ends with this suffix (e.g. "_TOT").
+
+        Returns
+        -------
+        pd.DataFrame
+            structure, series, model_type, max_forecast, last_observed, run_id.
+        """
+        query = """
+            SELECT r.structure, r.series, r.model_type, r.max_forecast, r.last_observed, r.run_id
+            FROM series_results r
+            JOIN (SELECT structure, MAX(run_id) AS run_id FROM runs
+                  WHERE completed = 1 GROUP BY structure) latest
+              ON r.run_id = latest.run_id
+        """
+        conditions, params = [], []
+        if structures:
+            conditions.append(f"r.structure IN ({', '.join('?' * len(structures))})")
+            params.extend(structures)
+        if suffix:
+            # Comparación literal: en LIKE el "_" de "_TOT" es un comodín
+            conditions.append("substr(r.series, -length(?)) = ?")
+            params.extend([suffix, suffix])
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY r.max_forecast DESC LIMIT ?"
+        params.append(n)
+        return pd.read_sql_query(query, self.conn, params=params)
+
+    def forecast(self, structure: str, series: str) -> pd.DataFrame:
+        """Forecast mean and interval per horizon step from the latest completed run."""
+        query = """
+            SELECT f.step, f.date, f.mean, f.lower, f.upper
+            FROM forecasts f
+            WHERE f.series = ? AND f.run_id = (
+                SELECT MAX(run_id) FROM runs WHERE structure = ? AND completed = 1
+            )
+            ORDER BY f.step
+        """
+        return pd.read_sql_query(query, self.conn, params=(series, structure), parse_dates=["date"])
+
+    def close(self) -> None:
+        self.conn.close()
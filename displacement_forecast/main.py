@@ -3,13 +3,17 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import locale
+import argparse
 from typing import List, Tuple, Dict
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from statsmodels.tsa.seasonal import seasonal_decompose
 from statsmodels.tsa.stattools import adfuller
 from statsmodels.tsa.statespace.sarimax import SARIMAX
 from prophet import Prophet
+from libs.decomposition import Decomposition, align_series, seasonal_decompose_2d
+from libs.results_store import ResultsStore
+from libs.alerts import AlertEngine, append_alerts
+from libs.backtest import run_backtest
 
 # Configuración global de formato numérico
 locale.setlocale(locale.LC_ALL, 'es_ES.UTF-8')
@@ -105,6 +109,11 @@ class Config:
     FORECAST_HORIZON: int = 6
     ROLLING_WINDOW: int = 6
     FORMAT_TYPE : str = "svg"
+    RESULTS_DB: str = "forecast_results.sqlite"
+    ALERT_STATE: str = "alert_state.json"
+    VELOCITY_THRESHOLD: float = 0.5  # cm/día, sobre ROLLING_WINDOW lecturas
+    ACCELERATION_THRESHOLD: float = 0.05  # cm/día²
+    BACKTEST_MIN_TRAIN: int = 36
 
 
 class TimeSeriesData:
@@ -295,32 +304,71 @@ class TimeSeriesAnalyzer:
             return "Desplazamiento horizontal absoluto", "Desplazamiento horizontal (cm)"
         return column, "Valor"
 
-    def __init__(self, output_dir: str, reports_dir: str):
+    def __init__(self, output_dir: str, reports_dir: str, store: ResultsStore = None,
+                 structure: str = Config.structure):
         self.plot_saver = PlotSaver(output_dir)
         self.result_saver = ResultSaver(reports_dir)
+        self.store = store
+        self.structure = structure
+        self.run_id = None
 
     def analyze(self, data: TimeSeriesData) -> None:
+        if self.store is not None:
+            self.run_id = self.store.start_run(self.structure, Config.FORECAST_HORIZON)
+
+        # Una sola descomposición vectorizada para todas las columnas de la estructura
+        decomposition = seasonal_decompose_2d(align_series(data.df, data.series_columns), period=6)
         for df in data.series_dfs:
             column = df.columns[1]
-            self._analyze_single_series(df, column)
+            self._analyze_single_series(df, column, decomposition)
+
+        # Guardar todos los resultados de la estructura en una sola transacción
+        if self.store is not None:
+            self.store.flush()
+
+    def _record_result(self, column: str, model_type: str, adf_output: pd.Series,
+                       is_stationary: bool, last_observed: float, max_value: float,
+                       dates, mean, lower, upper) -> None:
+        if self.store is None:
+            return
+        self.store.add_result(
+            self.run_id, self.structure, column, model_type, is_stationary, adf_output,
+            last_observed, max_value, dates, mean, lower, upper,
+        )
 
-    def _analyze_single_series(self, df: pd.DataFrame, column: str) -> None:
+    def _analyze_single_series(self, df: pd.DataFrame, column: str,
+                               decomposition: Decomposition = None) -> None:
         # Skip if not enough data (need at least 15 points for 2 complete cycles)
         if len(df) < 15:
             print(f"Advertencia: Serie '{column}' tiene menos de 15 observaciones. Análisis omitido.")
             return
 
         # Perform decomposition
-        self._plot_decomposition(df, column)
+        self._plot_decomposition(df, column, decomposition)
 
         # Perform forecasting
         self._forecast_series(df, column)
 
-    def _plot_decomposition(self, df: pd.DataFrame, column: str) -> None:
-        ts = df.set_index("date")[column]
-        decomposition = seasonal_decompose(ts, model="additive", period=6)
-
-        fig = decomposition.plot()
+    def _plot_decomposition(self, df: pd.DataFrame, column: str,
+                            decomposition: Decomposition = None) -> None:
+        if decomposition is None:
+            decomposition = seasonal_decompose_2d(align_series(df, [column]), period=6)
+        components = decomposition.component(column)
+
+        # Misma disposición que DecomposeResult.plot de statsmodels
+        fig, axes = plt.subplots(4, 1, sharex=True)
+        xlim = components.index[0], components.index[-1]
+        axes[0].plot(components["observed"])
+        axes[0].set_title(column)
+        axes[1].plot(components["trend"])
+        axes[1].set_ylabel("Trend")
+        axes[2].plot(components["seasonal"])
+        axes[2].set_ylabel("Seasonal")
+        axes[3].plot(components["resid"], marker="o", linestyle="none")
+        axes[3].plot(xlim, (0, 0), color="#000000", zorder=-3)
+        axes[3].set_ylabel("Resid")
+        for ax in axes:
+            ax.set_xlim(xlim)
         fig.set_size_inches(10, 10)
         
         # Rotar las etiquetas del eje X en cada subplot
@@ -379,6 +427,10 @@ class TimeSeriesAnalyzer:
             column, adf_output, is_stationary, max_forecast_value, "SARIMA"
         )
         self.result_saver.save_result(f"analysis_{column}.svg", combined_svg)
+        self._record_result(
+            column, "SARIMA", adf_output, is_stationary, ts.iloc[-1], max_forecast_value,
+            future_dates, pred_mean, pred_ci.iloc[:, 0], pred_ci.iloc[:, 1],
+        )
 
         # Plot forecast
         plt.figure(figsize=(15, 10))
@@ -425,6 +477,11 @@ class TimeSeriesAnalyzer:
             column, adf_output, is_stationary, max_forecast_value, "Prophet"
         )
         self.result_saver.save_result(f"analysis_{column}.svg", combined_svg)
+        future_rows = forecast.tail(Config.FORECAST_HORIZON)
+        self._record_result(
+            column, "Prophet", adf_output, is_stationary, df[column].iloc[-1], max_forecast_value,
+            future_rows["ds"], future_rows["yhat"], future_rows["yhat_lower"], future_rows["yhat_upper"],
+        )
 
         # Plot forecast
         plt.figure(figsize=(15, 10))
@@ -454,14 +511,56 @@ class TimeSeriesAnalyzer:
         self.plot_saver.save_plot(f"forecast_{column}")
 
 
+STRUCTURES = ["dd_abra", "dd_hidro", "dd_brunilda", "dd_gayco_630", "dd_gayco_580", "dd_gerencia"]
+
+
+def monitor(structures: List[str] = STRUCTURES) -> None:
+    """Streaming alert path: only the rows added since the last run are read."""
+    engine = AlertEngine(
+        Config.ALERT_STATE, Config.ROLLING_WINDOW, Config.VELOCITY_THRESHOLD,
+        Config.ACCELERATION_THRESHOLD,
+    )
+    for structure in structures:
+        file_path = f"{structure}.csv"
+        if not os.path.exists(file_path):
+            print(f"Advertencia: no se encontró '{file_path}'. Estructura omitida.")
+            continue
+        alerts = engine.ingest(structure, file_path)
+        for alert in alerts:
+            failure = f", falla estimada {alert.failure_date}" if alert.failure_date else ""
+            print(f"ALERTA {alert.structure}/{alert.series} {alert.date}: {alert.kind} "
+                  f"{alert.value:.4f} > {alert.threshold}{failure}")
+        reports_dir = f"{structure}/reports"
+        os.makedirs(reports_dir, exist_ok=True)
+        append_alerts(alerts, os.path.join(reports_dir, "alerts.csv"))
+    engine.save()
+
+
+def backtest(structures: List[str] = STRUCTURES, max_workers: int = None) -> None:
+    """Rolling-origin backtest of SARIMA and Prophet for every series."""
+    for structure in structures:
+        data = TimeSeriesData(f"{structure}.csv")
+        detail, summary = run_backtest(
+            data.series_dfs, Config.FORECAST_HORIZON, Config.BACKTEST_MIN_TRAIN, max_workers=max_workers
+        )
+        reports_dir = f"{structure}/reports"
+        os.makedirs(reports_dir, exist_ok=True)
+        detail.to_csv(os.path.join(reports_dir, "backtest.csv"), sep=";", index=False)
+        summary.to_csv(os.path.join(reports_dir, "backtest_summary.csv"), sep=";", index=False)
+        print(f"{structure}\n{summary}")
+
+
 def main():
     """Main execution function"""
-    structures = ["dd_abra", "dd_hidro", "dd_brunilda", "dd_gayco_630", "dd_gayco_580", "dd_gerencia"]
+    structures = STRUCTURES
     
     PlotConfig.setup_matplotlib()
     
     sns.set(style="ticks")
 
+    # Resultados consultables sin leer los SVG (ver ResultsStore.top_series)
+    store = ResultsStore(Config.RESULTS_DB)
+
     # Initialize data and analyzer
     for structure in structures:
         data_file = f"{structure}.csv"
@@ -470,9 +569,26 @@ def main():
         reports_dir = f"{structure}/reports"
         os.makedirs(output_dir, exist_ok=True)
         os.makedirs(reports_dir, exist_ok=True)
-        analyzer = TimeSeriesAnalyzer(output_dir, reports_dir)
+        analyzer = TimeSeriesAnalyzer(output_dir, reports_dir, store=store, structure=structure)
         analyzer.analyze(data)
 
+    print(store.top_series(n=10))
+    store.close()
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Análisis y pronóstico de desplazamientos.")
+    parser.add_argument("--alertas", action="store_true",
+                        help="Solo evaluar las alertas de velocidad/aceleración con las filas nuevas")
+    parser.add_argument("--backtest", action="store_true",
+                        help="Evaluar SARIMA y Prophet con pronósticos de origen móvil")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos para el backtest (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+
+    if args.alertas:
+        monitor()
+    elif args.backtest:
+        backtest(max_workers=args.workers)
+    else:
+        main()
@@ -1,12 +1,220 @@
+import io
 import os
+import csv
+import glob
+import json
+import importlib.util
 import numpy as np
 import matplotlib.pyplot as plt
-from obspy import read
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import lru_cache
+from obspy import Stream, read
+from obspy.io.mseed.util import get_record_information
+from scipy.signal import detrend, iirfilter, sosfilt
+
+
+def _cargar_modulo(nombre):
+    """Cargar un módulo de la carpeta de este script por su ruta, sin tocar sys.path."""
+    ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{nombre}.py")
+    spec = importlib.util.spec_from_file_location(f"particle_mov_analysis_{nombre}", ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# spectra.py está junto a este script; se carga igual desde cualquier carpeta
+_spectra = _cargar_modulo('spectra')
+PERIODOS = _spectra.PERIODOS
+clave_cache = _spectra.clave_cache
+espectro_fourier = _spectra.espectro_fourier
+espectro_respuesta = _spectra.espectro_respuesta
+guardar_cache = _spectra.guardar_cache
+leer_cache = _spectra.leer_cache
+
+
+@lru_cache(maxsize=32)
+def filtro_pasabanda_sos(sampling_rate, freqmin, freqmax, corners=4):
+    """Calcular (y cachear) el filtro Butterworth en formato SOS, igual al de ObsPy."""
+    fe = 0.5 * sampling_rate
+    low = freqmin / fe
+    high = freqmax / fe
+    # Igual que ObsPy: si freqmax supera Nyquist se aplica un pasa altos
+    if high - 1.0 > -1e-6:
+        return iirfilter(corners, low, btype='highpass', ftype='butter', output='sos')
+    return iirfilter(corners, [low, high], btype='band', ftype='butter', output='sos')
+
+
+# Figuras reutilizadas entre archivos dentro de un mismo proceso
+_figuras = {}
+
+
+def _obtener_figura(clave, reutilizar, *args, **kwargs):
+    """Crear una figura con plt.subplots o limpiar y devolver la ya creada."""
+    if reutilizar and clave in _figuras:
+        fig, axes = _figuras[clave]
+        for ax in np.ravel(axes):
+            ax.clear()
+        return fig, axes
+
+    fig, axes = plt.subplots(*args, **kwargs)
+    if reutilizar:
+        _figuras[clave] = (fig, axes)
+    return fig, axes
+
+
+def indices_envolvente(y, max_puntos=4000):
+    """Índices del mínimo y máximo de y por bloque, en orden temporal.
+
+    Reduce la serie a lo sumo a max_puntos muestras conservando los picos
+    visibles, de modo que el gráfico decimado es idéntico a simple vista.
+    """
+    if max_puntos < 2:
+        raise ValueError(f"max_puntos debe ser al menos 2 (mínimo y máximo por bloque): {max_puntos}")
+    n = len(y)
+    if n <= max_puntos:
+        return np.arange(n)
+
+    tam = int(np.ceil(n / (max_puntos // 2)))
+    nb = n // tam
+    bloques = np.asarray(y[:nb * tam]).reshape(nb, tam)
+    base = np.arange(nb) * tam
+    indices = np.sort(np.stack([base + bloques.argmin(axis=1),
+                                base + bloques.argmax(axis=1)], axis=1), axis=1).ravel()
+
+    # Último bloque incompleto
+    if nb * tam < n:
+        resto = np.asarray(y[nb * tam:])
+        extra = np.sort([nb * tam + resto.argmin(), nb * tam + resto.argmax()])
+        indices = np.concatenate([indices, extra])
+    return indices
+
+
+def _bloques_registro(archivo, registros_por_bloque=256):
+    """Generar Streams leyendo el miniSEED por bloques de registros con un memmap.
+
+    Los formatos sin registros de longitud fija (p. ej. .evt) se leen completos.
+    """
+    try:
+        reclen = get_record_information(archivo)['record_length']
+    except Exception:
+        reclen = None
+
+    if not reclen:
+        yield read(archivo, apply_calib=True)
+        return
+
+    mapa = np.memmap(archivo, dtype=np.uint8, mode='r')
+    paso = reclen * registros_por_bloque
+    for inicio in range(0, mapa.size - mapa.size % reclen, paso):
+        bloque = mapa[inicio:inicio + paso]
+        yield read(io.BytesIO(bloque.tobytes()), format='MSEED', apply_calib=True)
+
+
+def _fin_stream(stream):
+    return max(tr.stats.endtime for tr in stream) if len(stream) else None
+
+
+def solape_filtro(freqmin, periodos=5):
+    """Segundos previos necesarios para que se extinga el transitorio del filtro.
+
+    El Butterworth de 4 polos tarda varios periodos de la frecuencia de
+    corte inferior en estabilizarse (50 s por periodo a 0.02 Hz).
+    """
+    return periodos / freqmin
+
+
+def rellenar_huecos(trace):
+    """Interpolar los huecos (muestras enmascaradas) y devolver su máscara.
+
+    La interpolación solo sirve para poder filtrar la traza; las muestras
+    de la máscara no deben entrar en las estadísticas.
+    """
+    mascara = np.ma.getmaskarray(trace.data)
+    if mascara.any():
+        datos = np.ma.getdata(trace.data).astype(np.float64)
+        validos = np.flatnonzero(~mascara)
+        if len(validos):
+            datos[mascara] = np.interp(np.flatnonzero(mascara), validos, datos[validos])
+        trace.data = datos
+    return mascara
+
+
+def leer_ventanas(archivos, duracion_ventana=600.0, solape=250.0, registros_por_bloque=256):
+    """Generar (inicio, Stream) por ventanas consecutivas de registros continuos.
+
+    Cada ventana incluye `solape` segundos previos para que el transitorio del
+    filtro quede fuera del intervalo [inicio, inicio + duracion_ventana] (ver
+    solape_filtro). Los huecos del registro quedan enmascarados. En memoria
+    solo se conserva la ventana actual y un bloque de registros por archivo.
+    `archivos` puede ser una ruta o una lista (un archivo por canal).
+    """
+    if isinstance(archivos, str):
+        archivos = [archivos]
+
+    generadores = [_bloques_registro(a, registros_por_bloque) for a in archivos]
+    buffers = [Stream() for _ in archivos]
+    agotados = [False] * len(archivos)
+
+    def avanzar(k, hasta):
+        # Leer bloques del archivo k hasta cubrir el instante `hasta`
+        while not agotados[k] and (hasta is None or not len(buffers[k])
+                                   or _fin_stream(buffers[k]) < hasta):
+            try:
+                buffers[k] += next(generadores[k])
+                buffers[k].merge(method=1)
+            except StopIteration:
+                agotados[k] = True
+            if hasta is None:
+                break
+
+    for k in range(len(archivos)):
+        avanzar(k, None)
+    inicios = [tr.stats.starttime for b in buffers for tr in b]
+    if not inicios:
+        return
+    inicio = min(inicios)
+
+    while True:
+        fin_ventana = inicio + duracion_ventana
+        for k in range(len(archivos)):
+            avanzar(k, fin_ventana)
+
+        ventana = Stream()
+        for b in buffers:
+            ventana += b.slice(inicio - solape, fin_ventana).copy()
+        if len(ventana):
+            yield inicio, ventana
+
+        inicio = fin_ventana
+        for b in buffers:
+            b.trim(starttime=inicio - solape)
+        if all(agotados) and not any(_fin_stream(b) and _fin_stream(b) > inicio for b in buffers):
+            break
+
 
 class SeismicEventProcessor:
-    def __init__(self, archivo_evt):
+    # Pares de canales (x, y) usados para las órbitas si no hay mapeo
+    pares_orbita = [(0, 1), (3, 4)]
+
+    # Códigos de orientación SEED para el eje x y el eje y de una órbita
+    orientacion_x = 'E2'
+    orientacion_y = 'N1'
+
+    def __init__(self, archivo_evt, mapeo_canales=None):
+        """mapeo_canales: {'canales': [...], 'pares_orbita': 'auto' | [(x, y), ...]}.
+
+        Los canales son patrones sobre el código de canal o el id SEED
+        (p. ej. 'HN?' o 'RA.ROCA..HH*'). Los pares se indican con índices o
+        patrones; 'auto' empareja las componentes horizontales E/N (o 2/1)
+        de cada sensor. El mapeo puede agruparse por estación, con '*' como
+        valor por defecto: {'ROCA': {...}, '*': {...}}.
+        """
         self.archivo_evt = archivo_evt
+        self.mapeo_canales = mapeo_canales or {}
         self.stream = None
+        self.trazas = None
+        self._pares = None
         self.traces_data = []
         self.max_values = []
 
@@ -18,16 +226,92 @@ class SeismicEventProcessor:
             print(f"Error al leer el archivo .evt: {e}")
             self.stream = None
 
-    def procesar_trazas(self, freqmin=0.02, freqmax=0.2):
-        """Procesar las trazas del Stream y almacenar los datos procesados."""
+    def _configuracion(self):
+        """Configuración de canales aplicable a la estación del stream."""
+        mapeo = self.mapeo_canales
+        if 'canales' in mapeo or 'pares_orbita' in mapeo:
+            return mapeo
+        estacion = self.stream[0].stats.station if self.stream else None
+        return mapeo.get(estacion, mapeo.get('*', {}))
+
+    def seleccionar_trazas(self):
+        """Trazas a procesar según el mapeo (por defecto los 6 primeros canales)."""
+        patrones = self._configuracion().get('canales')
+        if not patrones:
+            return self.stream[:6]
+        return Stream([tr for tr in self.stream
+                       if any(fnmatch(tr.stats.channel, p) or fnmatch(tr.id, p) for p in patrones)])
+
+    def indices_orbitas(self):
+        """Pares de índices (x, y) sobre las trazas seleccionadas.
+
+        Se calculan una sola vez por selección de trazas y se reutilizan.
+        """
+        if self.trazas is None:
+            return []
+        if self._pares is None:
+            self._pares = self._resolver_orbitas()
+        return self._pares
+
+    def _resolver_orbitas(self):
+        ids = [tr.id for tr in self.trazas]
+        pares = self._configuracion().get('pares_orbita')
+
+        if pares is None:
+            pares = [par for par in self.pares_orbita if max(par) < len(ids)]
+        elif pares == 'auto':
+            # Agrupar por sensor (id sin la letra de orientación)
+            sensores = {}
+            for k, trace_id in enumerate(ids):
+                sensores.setdefault(trace_id[:-1], {})[trace_id[-1]] = k
+            pares = []
+            for componentes in sensores.values():
+                x = next((componentes[c] for c in self.orientacion_x if c in componentes), None)
+                y = next((componentes[c] for c in self.orientacion_y if c in componentes), None)
+                if x is not None and y is not None:
+                    pares.append((x, y))
+
+        def resolver(ref):
+            if isinstance(ref, int):
+                return ref if 0 <= ref < len(ids) else None
+            return next((k for k, tr in enumerate(self.trazas)
+                         if fnmatch(tr.stats.channel, ref) or fnmatch(tr.id, ref)), None)
+
+        # Un par que no se resuelve en esta estación se omite, no aborta el evento
+        resueltos = []
+        for x, y in pares:
+            ix, iy = resolver(x), resolver(y)
+            if ix is None or iy is None:
+                print(f"Par de órbita ({x}, {y}) sin trazas en {self.archivo_evt}, se omite.")
+                continue
+            resueltos.append((ix, iy))
+        return resueltos
+
+    def procesar_trazas(self, freqmin=0.02, freqmax=0.2, filtrar=True):
+        """Procesar las trazas del Stream y almacenar los datos procesados.
+
+        Con filtrar=False solo se escala y se corrige la tendencia.
+        """
         if not self.stream:
             print("El stream no ha sido cargado correctamente.")
             return
 
-        for trace in self.stream[:6]:  # Procesar solo los primeros 6 canales
+        trazas = self.trazas = self.seleccionar_trazas()
+        self._pares = None
+        if not trazas:
+            print("Ningún canal coincide con el mapeo configurado.")
+            return
+
+        # Los canales con igual longitud y muestreo se procesan como una matriz 2-D
+        if len({(tr.stats.npts, tr.stats.sampling_rate) for tr in trazas}) == 1:
+            self._procesar_matriz(trazas, freqmin, freqmax, filtrar)
+            return
+
+        for trace in trazas:
             trace.data *= 100  # Convertir a cm/s²
             trace.detrend(type='linear')  # Corrección de tendencia
-            trace.filter("bandpass", freqmin=freqmin, freqmax=freqmax)
+            if filtrar:
+                trace.filter("bandpass", freqmin=freqmin, freqmax=freqmax)
 
             # Guardar los datos procesados
             self.traces_data.append(trace.data)
@@ -36,18 +320,44 @@ class SeismicEventProcessor:
             max_abs_value = np.max(np.abs(trace.data))
             self.max_values.append(max_abs_value)
 
-    def graficar_trazas(self, output_dir):
-        """Generar gráficos para cada traza."""
-        if not self.traces_data:
+    def _procesar_matriz(self, trazas, freqmin, freqmax, filtrar=True):
+        """Escalar, corregir tendencia y filtrar todos los canales en una sola pasada."""
+        datos = np.vstack([tr.data for tr in trazas]).astype(np.float64)
+        datos *= 100  # Convertir a cm/s²
+        datos = detrend(datos, axis=1, type='linear')  # Corrección de tendencia
+
+        if filtrar:
+            sos = filtro_pasabanda_sos(trazas[0].stats.sampling_rate, freqmin, freqmax)
+            datos = sosfilt(sos, datos, axis=1)
+
+        # Las trazas comparten las filas de la matriz para los gráficos
+        for trace, fila in zip(trazas, datos):
+            trace.data = fila
+
+        self.traces_data = datos
+        self.max_values = np.max(np.abs(datos), axis=1)
+
+    def graficar_trazas(self, output_dir, formato='svg', rasterizar=False, max_puntos=4000,
+                        reutilizar=False):
+        """Generar gráficos para cada traza.
+
+        Las trazas se reducen a una envolvente mín/máx de max_puntos muestras.
+        Con rasterizar=True las curvas se incrustan como imagen dentro del SVG.
+        """
+        if len(self.traces_data) == 0:
             print("No hay datos procesados para graficar.")
             return
 
-        fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+        filas = int(np.ceil(len(self.trazas) / 3))
+        fig, axes = _obtener_figura(('trazas', filas), reutilizar, filas, 3,
+                                    figsize=(15, 5 * filas), squeeze=False)
         axes = axes.flatten()
 
-        for i, trace in enumerate(self.stream[:6]):
+        for i, trace in enumerate(self.trazas):
             ax = axes[i]
-            ax.plot(trace.times(), trace.data, label=f"{trace.stats.channel}")
+            indices = indices_envolvente(trace.data, max_puntos)
+            ax.plot(trace.times()[indices], trace.data[indices], label=f"{trace.stats.channel}",
+                    rasterized=rasterizar)
             ax.set_xlabel("Tiempo (s)")
             ax.set_ylabel("Aceleración (cm/s²)")
             ax.set_title(f"Componente {trace.stats.channel} {self.archivo_evt}")
@@ -59,48 +369,325 @@ class SeismicEventProcessor:
                     transform=ax.transAxes, ha='right', fontsize=10,
                     bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'))
 
-        plt.tight_layout()
+        # Ocultar los ejes sobrantes de la última fila
+        for ax in axes[len(self.trazas):]:
+            ax.set_visible(False)
+        for ax in axes[:len(self.trazas)]:
+            ax.set_visible(True)
+
+        fig.tight_layout()
 
         # Guardar el gráfico
-        output_svg = os.path.join(output_dir, os.path.basename(self.archivo_evt).replace('.evt', '_subplots.svg'))
-        plt.savefig(output_svg)
+        nombre = os.path.splitext(os.path.basename(self.archivo_evt))[0]
+        output_svg = os.path.join(output_dir, f"{nombre}_subplots.{formato}")
+        fig.savefig(output_svg)
+        if not reutilizar:
+            plt.close(fig)
         print(f"Subplots guardados en: {output_svg}")
 
-    def graficar_orbitas(self, output_dir):
+    def calcular_orbitas(self):
+        """Calcular ángulo y radio de todas las órbitas en una sola pasada.
+
+        Devuelve una lista de (theta, r), una por par de indices_orbitas().
+        """
+        pares = self.indices_orbitas()
+        if not pares:
+            return []
+
+        ix, iy = (list(k) for k in zip(*pares))
+        if isinstance(self.traces_data, np.ndarray):
+            x, y = self.traces_data[ix], self.traces_data[iy]
+        else:
+            # Canales de distinta longitud: recortar a la longitud común
+            n = min(len(self.traces_data[k]) for k in ix + iy)
+            x = np.vstack([self.traces_data[k][:n] for k in ix])
+            y = np.vstack([self.traces_data[k][:n] for k in iy])
+
+        r = np.hypot(x, y)
+        theta = np.arctan2(y, x)
+        return list(zip(theta, r))
+
+    def graficar_orbitas(self, output_dir, formato='svg', rasterizar=False, max_puntos=4000,
+                         reutilizar=False):
         """Graficar las órbitas de aceleraciones."""
-        if len(self.traces_data) < 6:
+        pares = self.indices_orbitas() if len(self.traces_data) else []
+        if not pares:
             print("No hay suficientes datos para graficar órbitas.")
             return
 
-        fig_orbit, axes_orbit = plt.subplots(1, 2, subplot_kw={'projection': 'polar'}, figsize=(12, 6))
-
-        # Primera órbita
-        x1, y1 = self.traces_data[0], self.traces_data[1]
-        r1 = np.sqrt(x1**2 + y1**2)
-        theta1 = np.arctan2(y1, x1)
-        max_orbit1 = np.max(r1)
-        
-        axes_orbit[0].plot(theta1, r1, label="Órbita 1")
-        axes_orbit[0].set_title(f"Órbita de aceleraciones (Canal 3 EO vs NS) {self.archivo_evt}")
-        axes_orbit[0].text(0.5, 1.05, f"Máx: {max_orbit1:.2f} cm/s²",
-                           transform=axes_orbit[0].transAxes, ha='center', fontsize=10,
-                           bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'))
-
-        # Segunda órbita
-        x2, y2 = self.traces_data[3], self.traces_data[4]
-        r2 = np.sqrt(x2**2 + y2**2)
-        theta2 = np.arctan2(y2, x2)
-        max_orbit2 = np.max(r2)
-
-        axes_orbit[1].plot(theta2, r2, label="Órbita 2")
-        axes_orbit[1].set_title("Órbita de aceleraciones (Canal 6 EO vs NS)")
-        axes_orbit[1].text(0.5, 1.05, f"Máx: {max_orbit2:.2f} cm/s²",
-                           transform=axes_orbit[1].transAxes, ha='center', fontsize=10,
-                           bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'))
-
-        plt.tight_layout()
-
-        # Guardar las órbitas como archivo SVG
-        output_orbit_svg = os.path.join(output_dir, os.path.basename(self.archivo_evt).replace('.evt', '_orbits.svg'))
-        plt.savefig(output_orbit_svg)
-        print(f"Órbitas guardadas en: {output_orbit_svg}")
\ No newline at end of file
+        fig_orbit, axes_orbit = _obtener_figura(('orbitas', len(pares)), reutilizar, 1, len(pares),
+                                                subplot_kw={'projection': 'polar'},
+                                                figsize=(6 * len(pares), 6), squeeze=False)
+        axes_orbit = axes_orbit.flatten()
+
+        for k, ((theta, r), (i, j)) in enumerate(zip(self.calcular_orbitas(), pares)):
+            ax = axes_orbit[k]
+            max_orbit = np.max(r)
+            indices = indices_envolvente(r, max_puntos)
+
+            ax.plot(theta[indices], r[indices], label=f"Órbita {k + 1}", rasterized=rasterizar)
+            titulo = (f"Órbita de aceleraciones ({self.trazas[i].stats.channel} vs "
+                      f"{self.trazas[j].stats.channel})")
+            ax.set_title(f"{titulo} {self.archivo_evt}" if k == 0 else titulo)
+            ax.text(0.5, 1.05, f"Máx: {max_orbit:.2f} cm/s²",
+                    transform=ax.transAxes, ha='center', fontsize=10,
+                    bbox=dict(facecolor='white', alpha=0.8, edgecolor='gray'))
+
+        fig_orbit.tight_layout()
+
+        # Guardar las órbitas
+        nombre = os.path.splitext(os.path.basename(self.archivo_evt))[0]
+        output_orbit_svg = os.path.join(output_dir, f"{nombre}_orbits.{formato}")
+        fig_orbit.savefig(output_orbit_svg)
+        if not reutilizar:
+            plt.close(fig_orbit)
+        print(f"Órbitas guardadas en: {output_orbit_svg}")
+
+    def calcular_espectros(self, periodos=PERIODOS, amortiguamiento=0.05, cache_dir=None):
+        """Calcular espectros de Fourier y de pseudo-aceleración de cada canal.
+
+        Se calculan sobre la aceleración sin filtrar (solo escalada y sin
+        tendencia): el pasabanda de las trazas eliminaría los periodos cortos.
+        Con cache_dir los resultados se guardan por hash del archivo y
+        parámetros de cálculo, y se reutilizan sin volver a leer el registro.
+        Un error de la caché solo se informa: los espectros se calculan igual.
+        """
+        clave = None
+        if cache_dir:
+            try:
+                clave = clave_cache(self.archivo_evt, senal='aceleracion sin filtro',
+                                    periodos=np.asarray(periodos, dtype=np.float64),
+                                    amortiguamiento=amortiguamiento,
+                                    mapeo=json.dumps(self.mapeo_canales, sort_keys=True))
+                resultados = leer_cache(cache_dir, clave)
+                if resultados is not None:
+                    return resultados
+            except Exception as e:
+                print(f"Error al leer la caché de espectros de {self.archivo_evt}: {e}")
+
+        # Las trazas de este procesador ya están filtradas: se relee el registro
+        procesador = SeismicEventProcessor(self.archivo_evt, self.mapeo_canales)
+        procesador.leer_archivo()
+        procesador.procesar_trazas(filtrar=False)
+        if len(procesador.traces_data) == 0:
+            return None
+
+        trazas = procesador.trazas
+        dt = trazas[0].stats.delta
+        n = min(len(data) for data in procesador.traces_data)
+        datos = np.vstack([data[:n] for data in procesador.traces_data])
+
+        frecuencias, fourier = espectro_fourier(datos, dt)
+        resultados = {
+            'canales': np.array([tr.id for tr in trazas]),
+            'frecuencias': frecuencias,
+            'fourier': fourier,
+            'periodos': np.asarray(periodos, dtype=np.float64),
+            'psa': espectro_respuesta(datos, dt, periodos, amortiguamiento),
+        }
+
+        if cache_dir and clave:
+            try:
+                guardar_cache(cache_dir, clave, resultados)
+            except Exception as e:
+                print(f"Error al guardar la caché de espectros de {self.archivo_evt}: {e}")
+        return resultados
+
+    def estadisticas_por_ventanas(self, archivos=None, duracion_ventana=600.0, solape=None,
+                                  freqmin=0.02, freqmax=0.2):
+        """Calcular pico, RMS y órbitas por ventana sin cargar el registro completo.
+
+        Devuelve una fila por ventana y componente; las muestras del solape
+        solo se usan para estabilizar el filtro y no entran en las estadísticas.
+        El solape es como mínimo solape_filtro(freqmin). Las muestras de los
+        huecos se interpolan para filtrar, se excluyen de pico y RMS y se
+        informan en 'huecos' (segundos).
+        """
+        minimo = solape_filtro(freqmin)
+        if solape is None:
+            solape = minimo
+        elif solape < minimo:
+            print(f"Solape de {solape:g} s insuficiente para {freqmin:g} Hz, se usa {minimo:g} s.")
+            solape = minimo
+
+        filas = []
+        for inicio, ventana in leer_ventanas(archivos or self.archivo_evt, duracion_ventana, solape):
+            mascaras = {tr.id: rellenar_huecos(tr) for tr in ventana}
+            procesador = SeismicEventProcessor(self.archivo_evt, self.mapeo_canales)
+            procesador.stream = ventana
+            procesador.procesar_trazas(freqmin=freqmin, freqmax=freqmax)
+            if len(procesador.traces_data) == 0:
+                continue
+
+            # Descartar las muestras previas a la ventana (solape)
+            datos, huecos = [], []
+            for trace, data in zip(procesador.trazas, procesador.traces_data):
+                n0 = max(0, int(round((inicio - trace.stats.starttime) * trace.stats.sampling_rate)))
+                data = data[n0:]
+                mascara = mascaras[trace.id][n0:n0 + len(data)]
+                datos.append(data)
+                huecos.append(mascara)
+                validos = data[~mascara]
+                if len(validos):
+                    filas.append({'inicio': str(inicio), 'componente': trace.id,
+                                  'pico': float(np.max(np.abs(validos))),
+                                  'rms': float(np.sqrt(np.mean(validos**2))),
+                                  'huecos': float(mascara.sum() * trace.stats.delta)})
+
+            for i, j in procesador.indices_orbitas():
+                n = min(len(datos[i]), len(datos[j]))
+                mascara = huecos[i][:n] | huecos[j][:n]
+                r = np.hypot(datos[i][:n], datos[j][:n])[~mascara]
+                if len(r):
+                    componente = f"Órbita {procesador.trazas[i].id} vs {procesador.trazas[j].stats.channel}"
+                    filas.append({'inicio': str(inicio), 'componente': componente,
+                                  'pico': float(np.max(r)), 'rms': float(np.sqrt(np.mean(r**2))),
+                                  'huecos': float(mascara.sum() * procesador.trazas[i].stats.delta)})
+        return filas
+
+
+def procesar_evento(archivo_evt, output_dir, freqmin=0.02, freqmax=0.2, formato='svg',
+                    rasterizar=False, max_puntos=4000, espectros=False, mapeo_canales=None):
+    """Procesar un archivo .evt completo y devolver sus filas de resumen."""
+    procesador = SeismicEventProcessor(archivo_evt, mapeo_canales)
+    procesador.leer_archivo()
+    procesador.procesar_trazas(freqmin=freqmin, freqmax=freqmax)
+
+    nombre = os.path.basename(archivo_evt)
+    if len(procesador.traces_data) == 0:
+        return [{'archivo': nombre, 'componente': '-', 'tipo': 'Error', 'maximo': np.nan}]
+
+    filas = []
+    for trace, max_abs_value in zip(procesador.trazas, procesador.max_values):
+        filas.append({'archivo': nombre, 'componente': trace.id,
+                      'tipo': 'PGA', 'maximo': float(max_abs_value)})
+
+    for (_, r), (i, j) in zip(procesador.calcular_orbitas(), procesador.indices_orbitas()):
+        componente = f"Órbita {procesador.trazas[i].id} vs {procesador.trazas[j].stats.channel}"
+        filas.append({'archivo': nombre, 'componente': componente,
+                      'tipo': 'Órbita', 'maximo': float(np.max(r))})
+
+    if espectros:
+        resultados = procesador.calcular_espectros(cache_dir=os.path.join(output_dir, '.cache_espectros'))
+        if resultados is not None:
+            output_csv = os.path.join(output_dir, f"{os.path.splitext(nombre)[0]}_psa.csv")
+            with open(output_csv, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+                writer = csv.writer(csv_file, delimiter=';')
+                writer.writerow(['periodo (s)'] + [f"PSA {canal} (cm/s²)" for canal in resultados['canales']])
+                writer.writerows(np.column_stack([resultados['periodos'], resultados['psa'].T]).tolist())
+
+    # Cada proceso del pool reutiliza sus figuras entre archivos
+    procesador.graficar_trazas(output_dir, formato, rasterizar, max_puntos, reutilizar=True)
+    procesador.graficar_orbitas(output_dir, formato, rasterizar, max_puntos, reutilizar=True)
+    return filas
+
+
+def procesar_lote(entrada, output_dir, freqmin=0.02, freqmax=0.2, max_workers=None,
+                  resumen_csv=None, formato='svg', rasterizar=False, max_puntos=4000,
+                  espectros=False, mapeo_canales=None):
+    """Procesar todos los .evt de una carpeta o patrón glob en un pool de procesos.
+
+    Escribe una tabla consolidada con el PGA por canal y el máximo de cada
+    órbita, y devuelve sus filas.
+    """
+    patron = os.path.join(entrada, '*.evt') if os.path.isdir(entrada) else entrada
+    archivos = sorted(glob.glob(patron))
+    if not archivos:
+        print(f"No se encontraron archivos .evt en: {entrada}")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    filas = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futuros = [executor.submit(procesar_evento, archivo, output_dir, freqmin, freqmax,
+                                   formato, rasterizar, max_puntos, espectros, mapeo_canales)
+                   for archivo in archivos]
+        for archivo, futuro in zip(archivos, futuros):
+            try:
+                filas.extend(futuro.result())
+            except Exception as e:
+                print(f"Error al procesar {archivo}: {e}")
+
+    # Escribe el resumen con separador de punto y coma
+    resumen_csv = resumen_csv or os.path.join(output_dir, 'resumen_picos.csv')
+    with open(resumen_csv, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+        writer = csv.writer(csv_file, delimiter=';')
+        writer.writerow(['archivo', 'componente', 'tipo', 'máximo (cm/s²)'])
+        writer.writerows([fila['archivo'], fila['componente'], fila['tipo'], fila['maximo']]
+                         for fila in filas)
+
+    print(f"Resumen guardado en: {resumen_csv}")
+    return filas
+
+
+def procesar_continuo(entrada, output_csv, duracion_ventana=600.0, solape=None,
+                      freqmin=0.02, freqmax=0.2, mapeo_canales=None):
+    """Calcular estadísticas por ventana de registros continuos y guardarlas en CSV.
+
+    Los archivos que coinciden con `entrada` (p. ej. los canales N, E, Z de
+    una estación descargados con download_mseed) se leen en paralelo como un
+    mismo registro.
+    """
+    archivos = sorted(glob.glob(entrada))
+    if not archivos:
+        print(f"No se encontraron archivos en: {entrada}")
+        return []
+
+    procesador = SeismicEventProcessor(archivos[0], mapeo_canales)
+    filas = procesador.estadisticas_por_ventanas(archivos, duracion_ventana, solape, freqmin, freqmax)
+
+    with open(output_csv, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+        writer = csv.writer(csv_file, delimiter=';')
+        writer.writerow(['inicio', 'componente', 'pico (cm/s²)', 'rms (cm/s²)', 'huecos (s)'])
+        writer.writerows([fila['inicio'], fila['componente'], fila['pico'], fila['rms'], fila['huecos']]
+                         for fila in filas)
+
+    print(f"Estadísticas por ventana guardadas en: {output_csv}")
+    return filas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Procesa en lote registros .evt y resume sus picos.')
+    parser.add_argument('entrada', help='Carpeta o patrón glob de archivos .evt')
+    parser.add_argument('--output', default='output',
+                        help='Carpeta de salida para gráficos y resumen (default: output)')
+    parser.add_argument('--freqmin', type=float, default=0.02,
+                        help='Frecuencia mínima del pasabanda en Hz (default: 0.02)')
+    parser.add_argument('--freqmax', type=float, default=0.2,
+                        help='Frecuencia máxima del pasabanda en Hz (default: 0.2)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Número de procesos (default: núcleos disponibles)')
+    parser.add_argument('--formato', choices=['svg', 'png'], default='svg',
+                        help='Formato de los gráficos (default: svg)')
+    parser.add_argument('--rasterizar', action='store_true',
+                        help='Incrustar las curvas como imagen dentro del SVG')
+    parser.add_argument('--max-puntos', type=int, default=4000,
+                        help='Máximo de puntos por canal en los gráficos (default: 4000)')
+    parser.add_argument('--espectros', action='store_true',
+                        help='Calcular espectros de respuesta (5%% de amortiguamiento) con caché')
+    parser.add_argument('--mapeo',
+                        help='JSON con la selección de canales y pares de órbita por estación')
+    parser.add_argument('--ventana', type=float, default=None,
+                        help='Procesar registros continuos por ventanas de N segundos')
+    parser.add_argument('--solape', type=float, default=None,
+                        help='Segundos previos de cada ventana para el filtro (default: 5/freqmin)')
+
+    args = parser.parse_args()
+    if args.max_puntos < 2:
+        parser.error('--max-puntos debe ser al menos 2')
+    mapeo_canales = None
+    if args.mapeo:
+        with open(args.mapeo, encoding='utf-8') as f:
+            mapeo_canales = json.load(f)
+
+    if args.ventana:
+        os.makedirs(args.output, exist_ok=True)
+        procesar_continuo(args.entrada, os.path.join(args.output, 'estadisticas_ventanas.csv'),
+                          args.ventana, args.solape, args.freqmin, args.freqmax, mapeo_canales)
+    else:
+        procesar_lote(args.entrada, args.output, args.freqmin, args.freqmax, args.workers,
+                      formato=args.formato, rasterizar=args.rasterizar, max_puntos=args.max_puntos,
+                      espectros=args.espectros, mapeo_canales=mapeo_canales)
@@ -0,0 +1,114 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+from scipy.signal import lfilter
+
+# Grilla de periodos por defecto (s)
+PERIODOS = np.logspace(-2, 1, 100)
+
+
+def espectro_fourier(datos, dt):
+    """Calcular el espectro de amplitudes de Fourier de cada canal (filas de datos)."""
+    datos = np.atleast_2d(datos)
+    frecuencias = np.fft.rfftfreq(datos.shape[1], d=dt)
+    amplitudes = np.abs(np.fft.rfft(datos, axis=1)) * dt
+    return frecuencias, amplitudes
+
+
+def _coeficientes_nigam_jennings(omega, amortiguamiento, dt):
+    """Matrices A y B de la recursión exacta para excitación lineal por tramos."""
+    z = amortiguamiento
+    raiz = np.sqrt(1 - z**2)
+    omega_d = omega * raiz
+    e = np.exp(-z * omega * dt)
+    s = np.sin(omega_d * dt)
+    c = np.cos(omega_d * dt)
+    q = z / raiz
+
+    a11 = e * (q * s + c)
+    a12 = e * s / omega_d
+    a21 = -omega / raiz * e * s
+    a22 = e * (c - q * s)
+
+    k1 = (2 * z**2 - 1) / (omega**2 * dt)
+    k2 = 2 * z / (omega**3 * dt)
+    b11 = e * ((k1 + z / omega) * s / omega_d + (k2 + 1 / omega**2) * c) - k2
+    b12 = -e * (k1 * s / omega_d + k2 * c) - 1 / omega**2 + k2
+    b21 = (e * ((k1 + z / omega) * (c - q * s) - (k2 + 1 / omega**2) * (omega_d * s + z * omega * c))
+           + 1 / (omega**2 * dt))
+    b22 = -e * (k1 * (c - q * s) - k2 * (omega_d * s + z * omega * c)) - 1 / (omega**2 * dt)
+    return a11, a12, a21, a22, b11, b12, b21, b22
+
+
+def espectro_respuesta(datos, dt, periodos=PERIODOS, amortiguamiento=0.05):
+    """Calcular el espectro de pseudo-aceleración (PSA) de cada canal.
+
+    La recursión de Nigam-Jennings de cada periodo equivale a un filtro IIR
+    de 2.º orden sobre la aceleración, que se aplica con lfilter a todos los
+    canales a la vez; el bucle en Python es solo sobre los periodos.
+    Devuelve un array con la misma unidad que datos y forma (canales, periodos).
+    """
+    datos = np.atleast_2d(np.asarray(datos, dtype=np.float64))
+    omega = 2 * np.pi / np.asarray(periodos, dtype=np.float64)
+    a11, a12, a21, a22, b11, b12, b21, b22 = _coeficientes_nigam_jennings(omega, amortiguamiento, dt)
+
+    # u(z)/ag(z) = [1 0] (zI - A)^-1 (B0 + z B1)
+    traza = a11 + a22
+    b = np.stack([b12, b11 - a22 * b12 + a12 * b22, a12 * b21 - a22 * b11], axis=1)
+    a = np.stack([np.ones_like(omega), -traza, a11 * a22 - a12 * a21], axis=1)
+
+    # Condición inicial que anula la respuesta a ag[0] antes del instante 0 (u0 = v0 = 0)
+    h0 = b12
+    h1 = a11 * b12 + a12 * b22
+    ag0 = datos[:, :1]
+
+    psa = np.empty((datos.shape[0], len(omega)))
+    for k in range(len(omega)):
+        zi = -ag0 * np.array([h0[k], h1[k] - traza[k] * h0[k]])
+        u, _ = lfilter(b[k], a[k], datos, axis=1, zi=zi)
+        psa[:, k] = omega[k]**2 * np.max(np.abs(u), axis=1)
+    return psa
+
+
+def hash_archivo(ruta, tam_bloque=1 << 20):
+    """Calcular el SHA-1 del contenido de un archivo leyendo por bloques."""
+    h = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def clave_cache(ruta, **parametros):
+    """Clave de caché a partir del contenido del archivo y los parámetros de cálculo."""
+    h = hashlib.sha1(hash_archivo(ruta).encode())
+    for nombre in sorted(parametros):
+        valor = parametros[nombre]
+        h.update(nombre.encode())
+        h.update(np.asarray(valor).tobytes() if isinstance(valor, np.ndarray) else repr(valor).encode())
+    return h.hexdigest()
+
+
+def leer_cache(cache_dir, clave):
+    """Devolver el diccionario guardado para la clave o None si no existe."""
+    ruta = os.path.join(cache_dir, f"{clave}.npz")
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta, allow_pickle=False) as datos:
+        return {k: datos[k] for k in datos.files}
+
+
+def guardar_cache(cache_dir, clave, resultados):
+    """Guardar un diccionario de arrays en la caché."""
+    os.makedirs(cache_dir, exist_ok=True)
+    # Temporal único: dos registros idénticos comparten clave en el mismo lote
+    fd, ruta_tmp = tempfile.mkstemp(dir=cache_dir, suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **resultados)
+        os.replace(ruta_tmp, os.path.join(cache_dir, f"{clave}.npz"))
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
@@ -0,0 +1,163 @@
+import os
+import numpy as np
+import zarr
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from obspy import Stream, Trace, UTCDateTime, read
+
+# Origen común de todos los canales: la muestra i corresponde a ORIGEN + i / fs
+ORIGEN = UTCDateTime(2000, 1, 1)
+# Valor de relleno para huecos en canales enteros
+RELLENO_ENTERO = np.iinfo(np.int32).min
+# Atributo del grupo con la firma (tamaño, mtime) de cada archivo ingerido
+MANIFIESTO = 'ingeridos'
+
+
+def _indice(tiempo, fs):
+    """Posición de la muestra correspondiente a un instante (búsqueda O(1))."""
+    return int(round((UTCDateTime(tiempo) - ORIGEN) * fs))
+
+
+def _decodificar(ruta):
+    """Leer un archivo miniSEED y devolver (id, fs, inicio, datos) por traza."""
+    stream = read(ruta, format='MSEED')
+    stream.merge(method=1)
+    resultado = []
+    for tr in stream:
+        datos = tr.data
+        if np.ma.isMaskedArray(datos):
+            datos = datos.filled(RELLENO_ENTERO if datos.dtype.kind == 'i' else np.nan)
+        resultado.append((tr.id, tr.stats.sampling_rate, str(tr.stats.starttime), datos))
+    return resultado
+
+
+def listar_mseed(base_path):
+    """Archivos de día del espejo {año}/{red}/{estación} de download_mseed."""
+    archivos = []
+    for raiz, _, nombres in os.walk(base_path):
+        archivos.extend(os.path.join(raiz, n) for n in nombres if '.D.' in n)
+    return sorted(archivos)
+
+
+class AlmacenFormasOnda:
+    """Almacén Zarr comprimido y fragmentado con un arreglo por canal.
+
+    Cada canal (NET.STA.LOC.CHA) es un arreglo 1-D sobre una grilla de
+    tiempo fija desde ORIGEN, de modo que una ventana se ubica con
+    aritmética y solo se leen y descomprimen los fragmentos que la cubren.
+    Los huecos quedan con el valor de relleno. Los fragmentos abarcan
+    segundos_por_fragmento (1 h por defecto), alineados con los días.
+    """
+
+    def __init__(self, ruta, segundos_por_fragmento=3600):
+        self.ruta = ruta
+        self.segundos_por_fragmento = segundos_por_fragmento
+        self.grupo = zarr.open_group(ruta, mode='a')
+        # El manifiesto va en los atributos: un archivo suelto dentro de la
+        # jerarquía no es un componente Zarr válido
+        self.ingeridos = dict(self.grupo.attrs.get(MANIFIESTO, {}))
+
+    def canales(self):
+        return sorted(nombre for nombre, _ in self.grupo.arrays())
+
+    def _arreglo(self, seed_id, fs, dtype):
+        if seed_id in self.grupo:
+            arreglo = self.grupo[seed_id]
+            if arreglo.attrs['sampling_rate'] != fs:
+                raise ValueError(f"{seed_id}: frecuencia de muestreo {fs} distinta de "
+                                 f"{arreglo.attrs['sampling_rate']}")
+            return arreglo
+
+        entero = np.dtype(dtype).kind in 'iu'
+        arreglo = self.grupo.create_array(
+            seed_id, shape=(0,), chunks=(int(fs * self.segundos_por_fragmento),),
+            dtype='i4' if entero else 'f4', fill_value=RELLENO_ENTERO if entero else np.nan,
+        )
+        arreglo.attrs['sampling_rate'] = fs
+        return arreglo
+
+    def _escribir(self, seed_id, fs, inicio, datos):
+        arreglo = self._arreglo(seed_id, fs, datos.dtype)
+        i0 = _indice(inicio, fs)
+        if i0 < 0:
+            raise ValueError(f"{seed_id}: datos anteriores a {ORIGEN}")
+        fin = i0 + len(datos)
+        if fin > arreglo.shape[0]:
+            arreglo.resize((fin,))
+        arreglo[i0:fin] = datos.astype(arreglo.dtype, copy=False)
+
+    def ingerir(self, archivos, max_workers=None):
+        """Agregar los archivos nuevos o modificados; devuelve cuántos se ingirieron.
+
+        La decodificación se reparte en procesos y la escritura se hace en
+        el proceso principal, en orden, para no escribir en paralelo sobre
+        el mismo fragmento.
+        """
+        pendientes = []
+        for ruta in archivos:
+            st = os.stat(ruta)
+            firma = [st.st_size, st.st_mtime_ns]
+            if self.ingeridos.get(os.path.abspath(ruta)) != firma:
+                pendientes.append((ruta, firma))
+        if not pendientes:
+            return 0
+
+        rutas = [ruta for ruta, _ in pendientes]
+        if max_workers == 1:
+            decodificados = map(_decodificar, rutas)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+            decodificados = executor.map(_decodificar, rutas, chunksize=4)
+
+        try:
+            for (ruta, firma), trazas in zip(pendientes, decodificados):
+                for seed_id, fs, inicio, datos in trazas:
+                    self._escribir(seed_id, fs, inicio, datos)
+                self.ingeridos[os.path.abspath(ruta)] = firma
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self._guardar_manifiesto()
+        return len(pendientes)
+
+    def _guardar_manifiesto(self):
+        self.grupo.attrs[MANIFIESTO] = self.ingeridos
+
+    def leer(self, seed_id, inicio, fin):
+        """Traza del canal entre inicio y fin; los huecos quedan enmascarados."""
+        arreglo = self.grupo[seed_id]
+        fs = arreglo.attrs['sampling_rate']
+        i0 = max(_indice(inicio, fs), 0)
+        i1 = min(_indice(fin, fs), arreglo.shape[0])
+        datos = arreglo[i0:i1] if i1 > i0 else np.array([], dtype=arreglo.dtype)
+
+        huecos = np.isnan(datos) if datos.dtype.kind == 'f' else datos == RELLENO_ENTERO
+        if huecos.any():
+            datos = np.ma.masked_array(datos, mask=huecos)
+
+        red, estacion, ubicacion, canal = seed_id.split('.')
+        return Trace(data=datos, header={
+            'network': red, 'station': estacion, 'location': ubicacion, 'channel': canal,
+            'sampling_rate': fs, 'starttime': ORIGEN + i0 / fs,
+        })
+
+    def leer_ventana(self, inicio, fin, patron='*'):
+        """Stream con todos los canales que coinciden con patron (fnmatch sobre el id)."""
+        return Stream([self.leer(c, inicio, fin) for c in self.canales() if fnmatch(c, patron)])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Convierte el espejo miniSEED de download_mseed en un almacén Zarr por canal.')
+    parser.add_argument('entrada', help='Carpeta base del espejo {año}/{red}/{estación}')
+    parser.add_argument('almacen', help='Carpeta del almacén Zarr')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos para decodificar (por defecto, todos los núcleos)')
+    args = parser.parse_args()
+
+    almacen = AlmacenFormasOnda(args.almacen)
+    n = almacen.ingerir(listar_mseed(args.entrada), max_workers=args.workers)
+    print(f"{n} archivos ingeridos; {len(almacen.canales())} canales en {args.almacen}.")
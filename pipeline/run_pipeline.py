@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import shlex
+import hashlib
+import subprocess
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ESTADO = '.pipeline_state.json'
+
+
+def cargar_pipeline(config_path):
+    """Lee la definición de tareas (JSON) y valida dependencias y ciclos."""
+    with open(config_path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    tareas = {t['name']: t for t in config['tasks']}
+    for tarea in tareas.values():
+        tarea.setdefault('deps', [])
+        tarea.setdefault('inputs', [])
+        tarea.setdefault('outputs', [])
+        tarea.setdefault('cwd', '.')
+        tarea.setdefault('manual', False)
+        for dep in tarea['deps']:
+            if dep not in tareas:
+                raise ValueError(f"La tarea '{tarea['name']}' depende de '{dep}', que no existe")
+
+    # Orden topológico (detecta ciclos)
+    orden, visitadas, en_curso = [], set(), set()
+
+    def visitar(nombre):
+        if nombre in visitadas:
+            return
+        if nombre in en_curso:
+            raise ValueError(f"Ciclo de dependencias en '{nombre}'")
+        en_curso.add(nombre)
+        for dep in tareas[nombre]['deps']:
+            visitar(dep)
+        en_curso.discard(nombre)
+        visitadas.add(nombre)
+        orden.append(nombre)
+
+    for nombre in tareas:
+        visitar(nombre)
+    return [tareas[n] for n in orden]
+
+
+class HashArchivos:
+    """Hash de contenido con caché por (tamaño, mtime) para no releer archivos sin cambios."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or {}
+
+    def hash(self, ruta):
+        st = os.stat(ruta)
+        firma = [st.st_size, st.st_mtime_ns]
+        entrada = self.cache.get(ruta)
+        if entrada and entrada[0] == firma:
+            return entrada[1]
+        h = hashlib.blake2b(digest_size=16)
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                h.update(bloque)
+        self.cache[ruta] = [firma, h.hexdigest()]
+        return h.hexdigest()
+
+    def firma(self, base_dir, patrones):
+        """Hash combinado de todos los archivos que coinciden con los patrones."""
+        rutas = sorted({
+            ruta for patron in patrones
+            for ruta in glob.glob(os.path.join(base_dir, patron), recursive=True)
+            if os.path.isfile(ruta)
+        })
+        h = hashlib.blake2b(digest_size=16)
+        for ruta in rutas:
+            h.update(os.path.relpath(ruta, base_dir).encode())
+            h.update(self.hash(ruta).encode())
+        return h.hexdigest(), len(rutas)
+
+
+class Pipeline:
+    """Ejecuta solo las tareas cuyas entradas, comando o salidas cambiaron.
+
+    Cada tarea declara comando, carpeta de trabajo, entradas, salidas
+    (patrones glob relativos al archivo de configuración) y dependencias.
+    Una tarea se vuelve a ejecutar si cambia el hash de contenido de sus
+    entradas o su comando, si falta alguna salida o si se fuerza. Como las
+    salidas de una tarea son entradas de las siguientes, un cambio se
+    propaga solo hacia abajo. Las tareas independientes corren en paralelo.
+    """
+
+    def __init__(self, config_path, max_workers=4):
+        self.base_dir = os.path.dirname(os.path.abspath(config_path))
+        self.tareas = cargar_pipeline(config_path)
+        self.max_workers = max_workers
+        self.ruta_estado = os.path.join(self.base_dir, ESTADO)
+        self.estado = {'tasks': {}, 'files': {}}
+        if os.path.exists(self.ruta_estado):
+            with open(self.ruta_estado, encoding='utf-8') as f:
+                self.estado = json.load(f)
+        self.hashes = HashArchivos(self.estado['files'])
+
+    def _clave(self, tarea):
+        entradas, _ = self.hashes.firma(self.base_dir, tarea['inputs'])
+        return hashlib.blake2b(
+            json.dumps([tarea['cmd'], tarea['cwd'], entradas]).encode(), digest_size=16
+        ).hexdigest()
+
+    def _faltan_salidas(self, tarea):
+        return any(
+            not glob.glob(os.path.join(self.base_dir, patron), recursive=True)
+            for patron in tarea['outputs']
+        )
+
+    def pendiente(self, tarea, forzar=False):
+        """Motivo por el que la tarea debe ejecutarse, o None si está al día."""
+        if forzar:
+            return 'forzada'
+        previo = self.estado['tasks'].get(tarea['name'])
+        if previo is None:
+            return 'sin ejecuciones previas'
+        if self._faltan_salidas(tarea):
+            return 'faltan salidas'
+        if previo != self._clave(tarea):
+            return 'entradas o comando modificados'
+        return None
+
+    def _ejecutar(self, tarea):
+        cmd = tarea['cmd'] if isinstance(tarea['cmd'], list) else shlex.split(tarea['cmd'])
+        cwd = os.path.join(self.base_dir, tarea['cwd'])
+        print(f"[{tarea['name']}] {' '.join(cmd)}")
+        try:
+            resultado = subprocess.run(cmd, cwd=cwd)
+        except OSError as e:
+            # Ejecutable o carpeta inexistente: la tarea falla, el pipeline sigue
+            print(f"[{tarea['name']}] no se pudo ejecutar: {e}")
+            return 127
+        return resultado.returncode
+
+    def run(self, forzar=(), incluir_manuales=False, dry_run=False):
+        """Ejecuta el pipeline; devuelve {tarea: 'ok' | 'al día' | 'omitida' | 'error'}."""
+        resultado = {}
+        restantes = {t['name']: t for t in self.tareas}
+        en_curso = {}
+        simuladas = set()
+
+        def lista(tarea):
+            return all(resultado.get(dep) in ('ok', 'al día', 'omitida') for dep in tarea['deps'])
+
+        # El estado de las tareas terminadas se guarda aunque el pipeline falle
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while restantes or en_curso:
+                    for nombre, tarea in list(restantes.items()):
+                        if any(resultado.get(dep) == 'error' or resultado.get(dep) == 'bloqueada'
+                               for dep in tarea['deps']):
+                            resultado[nombre] = 'bloqueada'
+                            del restantes[nombre]
+                            continue
+                        if not lista(tarea):
+                            continue
+                        del restantes[nombre]
+
+                        # Las entradas se evalúan cuando las dependencias ya terminaron
+                        motivo = self.pendiente(tarea, nombre in forzar)
+                        if motivo is None and dry_run and any(d in simuladas for d in tarea['deps']):
+                            motivo = 'dependencia pendiente'
+                        if tarea['manual'] and not incluir_manuales and nombre not in forzar:
+                            motivo = None
+                            resultado[nombre] = 'omitida'
+                        if motivo is None:
+                            resultado.setdefault(nombre, 'al día')
+                            continue
+                        print(f"[{nombre}] pendiente: {motivo}")
+                        if dry_run:
+                            simuladas.add(nombre)
+                            resultado[nombre] = 'ok'
+                            continue
+                        en_curso[executor.submit(self._ejecutar, tarea)] = tarea
+
+                    if not en_curso:
+                        if restantes and not any(lista(t) for t in restantes.values()):
+                            break
+                        continue
+
+                    terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                    for futuro in terminados:
+                        tarea = en_curso.pop(futuro)
+                        if futuro.result() == 0:
+                            resultado[tarea['name']] = 'ok'
+                            # Se registra el estado posterior: una tarea que modifica sus
+                            # propias entradas (p. ej. rename_txt) no vuelve a ejecutarse
+                            self.estado['tasks'][tarea['name']] = self._clave(tarea)
+                        else:
+                            resultado[tarea['name']] = 'error'
+                            print(f"[{tarea['name']}] terminó con código {futuro.result()}")
+        finally:
+            if not dry_run:
+                self._guardar_estado()
+        return resultado
+
+    def _guardar_estado(self):
+        tmp = f"{self.ruta_estado}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f)
+        os.replace(tmp, self.ruta_estado)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Ejecuta solo las etapas del flujo mensual afectadas por cambios.')
+    parser.add_argument('config', nargs='?', default='pipeline.json',
+                        help='Definición de tareas (default: pipeline.json)')
+    parser.add_argument('--force', nargs='*', default=[],
+                        help='Tareas a ejecutar aunque estén al día')
+    parser.add_argument('--manual', action='store_true',
+                        help='Incluir tareas manuales (descargas interactivas)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Tareas en paralelo (default: 4)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Muestra qué tareas se ejecutarían')
+
+    args = parser.parse_args()
+    pipeline = Pipeline(args.config, args.workers)
+    for nombre, estado in pipeline.run(set(args.force), args.manual, args.dry_run).items():
+        print(f"{nombre}: {estado}")
@@ -1,61 +1,185 @@
 import os
 import ezdxf
+from array import array
+from itertools import chain
+import numpy as np
+import shapely
+from concurrent.futures import ProcessPoolExecutor
 from shapely.geometry import LineString, Polygon
 from shapely.ops import split
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+# Geometría compartida por cada proceso del pool (solo lectura)
+_lineas_geom = None
+_indice = None
 
 # Función para convertir una polilínea DXF en una geometría Shapely (LineString)
 def polyline_to_linestring(polyline):
     points = [(point[0], point[1]) for point in polyline.points()]
     return LineString(points)
 
+# Función para recorrer las LWPOLYLINE del modelspace, cargando o no todo el dibujo
+def _iterar_lwpolylines(dxf_path, streaming=False):
+    if streaming:
+        # iterdxf lee las entidades una a una desde el archivo sin construir el documento
+        from ezdxf.addons import iterdxf
+        yield from iterdxf.modelspace(dxf_path, types=['LWPOLYLINE'])
+    else:
+        yield from ezdxf.readfile(dxf_path).modelspace().query('LWPOLYLINE')
+
+# Función para leer el DXF una sola vez y extraer solo las coordenadas necesarias
+def extraer_coordenadas(dxf_path, capa_lineas='lineas', capa_poligonos='poligonos', streaming=False):
+    """Devuelve (coords, offsets, poligonos) a partir de las LWPOLYLINE del DXF.
+
+    Las líneas se empaquetan en un único array (N, 2) y un array de offsets,
+    de modo que se envían a los procesos sin serializar entidades de ezdxf.
+    Con streaming=True las entidades se leen de a una con iterdxf y solo se
+    conservan las coordenadas, lo que permite procesar dibujos que no caben
+    en memoria como documento de ezdxf.
+    """
+    # Buffers planos de doubles: sin un objeto por vértice ni por polilínea
+    coords = array('d')
+    longitudes = array('q')
+    poligonos = []
+    for e in _iterar_lwpolylines(dxf_path, streaming):
+        capa = e.dxf.layer
+        if capa == capa_lineas:
+            puntos = e.get_points('xy')
+            longitudes.append(len(puntos))
+            coords.extend(chain.from_iterable(puntos))
+        elif capa == capa_poligonos and e.closed:
+            poligonos.append(np.array(e.get_points('xy'), dtype=float).reshape(-1, 2))
+
+    offsets = np.zeros(len(longitudes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.frombuffer(longitudes, dtype=np.int64))
+    return np.frombuffer(coords, dtype=float).reshape(-1, 2), offsets, poligonos
+
+# Función para inicializar la geometría compartida en cada proceso
+def _inicializar_worker(coords, offsets):
+    global _lineas_geom, _indice
+    # Construcción vectorizada de todas las LineString en un array de geometrías
+    indices = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    _lineas_geom = shapely.linestrings(coords, indices=indices) if len(coords) else np.empty(0, dtype=object)
+    _indice = STRtree(_lineas_geom)
+
+# Función para recortar línea por línea con el polígono preparado
+def _recortar_lineas(poligono_geom):
+    poligono_prep = prep(poligono_geom)
+    segmentos = []
+
+    # Procesar solo las polilíneas cuyo bbox toca al polígono
+    for j in _indice.query(poligono_geom):
+        linea_geom = _lineas_geom[j]
+        if not poligono_prep.intersects(linea_geom):
+            continue
+
+        # Si la línea está completamente dentro no hace falta recortarla
+        if poligono_prep.contains(linea_geom):
+            interseccion = linea_geom
+        else:
+            # Intersección entre la polilínea y el polígono
+            interseccion = poligono_geom.intersection(linea_geom)
+
+        # Conservar los tramos lineales de la intersección
+        if isinstance(interseccion, LineString):
+            segmentos.append(np.asarray(interseccion.coords))
+        elif interseccion.geom_type in ('MultiLineString', 'GeometryCollection'):
+            for line in interseccion.geoms:
+                if isinstance(line, LineString):
+                    segmentos.append(np.asarray(line.coords))
+    return segmentos
+
+# Función para recortar todas las líneas candidatas en una sola llamada vectorizada
+def _recortar_lineas_batch(poligono_geom):
+    candidatos = _indice.query(poligono_geom, predicate='intersects')
+    if len(candidatos) == 0:
+        return []
+
+    interseccion = shapely.intersection(_lineas_geom[candidatos], poligono_geom)
+
+    # Separar MultiLineString/GeometryCollection y quedarse solo con LineString
+    partes = shapely.get_parts(interseccion)
+    partes = partes[shapely.get_type_id(partes) == shapely.GeometryType.LINESTRING]
+    if len(partes) == 0:
+        return []
+
+    coords, indices = shapely.get_coordinates(partes, return_index=True)
+    cortes = np.flatnonzero(np.diff(indices)) + 1
+    return np.split(coords, cortes)
+
+# Función para recortar las líneas con un polígono y guardar su DXF
+def _exportar_poligono(i, poligono_coords, output_folder, capa_lineas='lineas', batch=False):
+    # Convertir el polígono en una geometría Shapely (Polygon)
+    poligono_geom = Polygon(poligono_coords)
+
+    if batch:
+        segmentos = _recortar_lineas_batch(poligono_geom)
+    else:
+        segmentos = _recortar_lineas(poligono_geom)
+
+    # Crear un nuevo archivo DXF para este polígono y agregar los segmentos
+    new_doc = ezdxf.new(dxfversion="R2010")
+    new_msp = new_doc.modelspace()
+    atributos = {'layer': capa_lineas}
+    for puntos in segmentos:
+        new_msp.add_lwpolyline(puntos, format='xy', dxfattribs=atributos)
+
+    # Guardar el archivo DXF individual en la carpeta de salida
+    output_path = os.path.join(output_folder, f"poligono_{i+1}.dxf")
+    new_doc.saveas(output_path)
+    return output_path
+
 # Función para procesar cada polígono y crear un DXF con las polilíneas cortadas
-def crear_dxf_por_poligono(dxf_path, output_folder):
+def crear_dxf_por_poligono(dxf_path, output_folder, capa_lineas='lineas',
+                           capa_poligonos='poligonos', paralelo=False, max_workers=None,
+                           batch=False, streaming=False):
     # Crear la carpeta de salida si no existe
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
-    # Cargar el archivo DXF
-    doc = ezdxf.readfile(dxf_path)
-    msp = doc.modelspace()
+    # Cargar el archivo DXF una sola vez
+    coords, offsets, poligonos = extraer_coordenadas(dxf_path, capa_lineas, capa_poligonos, streaming)
 
-    # Extraer las polilíneas de la capa "lineas" y los polígonos de la capa "poligonos"
-    lineas = [e for e in msp.query('LWPOLYLINE') if e.dxf.layer == 'lineas']
-    poligonos = [e for e in msp.query('LWPOLYLINE') if e.dxf.layer == 'poligonos' and e.closed]
+    if not paralelo:
+        _inicializar_worker(coords, offsets)
+        for i, poligono_coords in enumerate(poligonos):
+            output_path = _exportar_poligono(i, poligono_coords, output_folder, capa_lineas, batch)
+            print(f"Archivo '{output_path}' creado.")
+        return
 
-    for i, poligono_entity in enumerate(poligonos):
-        # Convertir el polígono en una geometría Shapely (Polygon)
-        poligono_geom = Polygon(polyline_to_linestring(poligono_entity).coords)
+    # Cada proceso recibe los arrays una vez y construye su propio índice
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_inicializar_worker,
+                             initargs=(coords, offsets)) as executor:
+        futuros = [
+            executor.submit(_exportar_poligono, i, poligono_coords, output_folder, capa_lineas, batch)
+            for i, poligono_coords in enumerate(poligonos)
+        ]
+        for futuro in futuros:
+            print(f"Archivo '{futuro.result()}' creado.")
 
-        # Crear un nuevo archivo DXF para este polígono
-        new_doc = ezdxf.new(dxfversion="R2010")
-        new_msp = new_doc.modelspace()
 
-        # Procesar cada polilínea y recortarla
-        for linea_entity in lineas:
-            linea_geom = polyline_to_linestring(linea_entity)
-            
-            # Intersección entre la polilínea y el polígono
-            interseccion = poligono_geom.intersection(linea_geom)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Recorta las polilíneas de un DXF con cada polígono.')
+    parser.add_argument('dxf', nargs='?', default=r'C:\Users\joel.alarcon\Downloads\FUENTES\ACAD-l-intraslab.dxf',
+                        help='Archivo DXF de entrada')
+    parser.add_argument('--output', default='output',
+                        help='Carpeta de salida (default: output)')
+    parser.add_argument('--capa-lineas', default='lineas',
+                        help='Capa con las polilíneas a recortar (default: lineas)')
+    parser.add_argument('--capa-poligonos', default='poligonos',
+                        help='Capa con los polígonos de corte (default: poligonos)')
+    parser.add_argument('--paralelo', action='store_true',
+                        help='Exportar los polígonos en un pool de procesos')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Número de procesos (default: núcleos disponibles)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Recortar con operaciones vectorizadas de Shapely 2')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Leer el DXF entidad por entidad (dibujos muy grandes)')
 
-            # Si hay intersección, agregar los segmentos al nuevo DXF
-            if not interseccion.is_empty:
-                # Convertir la geometría de intersección en una polilínea DXF
-                if isinstance(interseccion, LineString):
-                    puntos = list(interseccion.coords)
-                    new_polyline = new_msp.add_lwpolyline(puntos)
-                    new_polyline.dxf.layer = 'lineas'
-                elif interseccion.geom_type == 'MultiLineString':
-                    for line in interseccion:
-                        puntos = list(line.coords)
-                        new_polyline = new_msp.add_lwpolyline(puntos)
-                        new_polyline.dxf.layer = 'lineas'
-
-        # Guardar el archivo DXF individual en la carpeta de salida
-        output_path = os.path.join(output_folder, f"poligono_{i+1}.dxf")
-        new_doc.saveas(output_path)
-        print(f"Archivo '{output_path}' creado.")
-
-
-carpeta_salida = "output"
-ruta_dxf = r'C:\Users\joel.alarcon\Downloads\FUENTES\ACAD-l-intraslab.dxf'
-crear_dxf_por_poligono(ruta_dxf, carpeta_salida)
+    args = parser.parse_args()
+    crear_dxf_por_poligono(args.dxf, args.output, args.capa_lineas, args.capa_poligonos,
+                           args.paralelo, args.workers, args.batch, args.streaming)
@@ -47,8 +47,14 @@ def download_files(sftp, local_base_path, start_date, end_date):
                     print(f"No encontrado: {remote_path}")
 
 if __name__ == "__main__":
+    import argparse
     from dotenv import load_dotenv
 
+    parser = argparse.ArgumentParser(description='Descarga archivos miniSEED por rango de fechas.')
+    parser.add_argument('destino', nargs='?', default='path/to/local/directory',
+                        help='Carpeta local de descarga (default: path/to/local/directory)')
+    args = parser.parse_args()
+
     # Cargar variables de entorno desde el archivo .env
     load_dotenv()
 
@@ -58,7 +64,7 @@ if __name__ == "__main__":
     username = os.getenv("SSH_USERNAME")
     password = os.getenv("SSH_PASSWORD")
 
-    local_base_path = 'path/to/local/directory'
+    local_base_path = args.destino
 
     try:
         print("Conectando al servidor...")
@@ -51,8 +51,14 @@ def download_files(ssh_client, files, local_base_path):
 
 
 if __name__ == "__main__":
+    import argparse
     from dotenv import load_dotenv
 
+    parser = argparse.ArgumentParser(description='Descarga registros .txt de eventos por rango de fechas.')
+    parser.add_argument('destino', nargs='?', default='path/to/local/directory',
+                        help='Carpeta local de descarga (default: path/to/local/directory)')
+    args = parser.parse_args()
+
     # Cargar variables de entorno desde el archivo .env
     load_dotenv()
 
@@ -65,7 +71,7 @@ if __name__ == "__main__":
     # Ruta en el servidor
     remote_base_path = "/var/www/html/sensor/events/"
     # Ruta local
-    local_base_path = "path/to/local/directory"
+    local_base_path = args.destino
 
     try:
         print("Conectando al servidor...")
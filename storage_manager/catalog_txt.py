@@ -0,0 +1,193 @@
+import os
+import re
+import json
+import sqlite3
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from rename_txt import fecha_regex, network_code
+
+# Máximo de líneas de cabecera que se leen por archivo
+max_lineas_cabecera = 60
+
+# Líneas de cabecera con la forma "# CLAVE: valor"
+campo_regex = re.compile(r"^#\s*([^:]+?)\s*:\s*(.*?)\s*$")
+red_regex = re.compile(r"^RED_([A-Za-z0-9]+)")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    ruta TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    red TEXT,
+    estacion TEXT,
+    inicio TEXT,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    cabecera TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_registros_red_inicio ON registros(red, inicio);
+CREATE INDEX IF NOT EXISTS idx_registros_estacion_inicio ON registros(estacion, inicio);
+CREATE INDEX IF NOT EXISTS idx_registros_inicio ON registros(inicio);
+"""
+
+
+def leer_cabecera(file_path):
+    """Lee una sola vez la cabecera del registro y devuelve sus campos.
+
+    Se detiene en la primera línea que no es de cabecera (o en
+    max_lineas_cabecera), sin cargar las muestras del registro.
+    """
+    campos = {}
+    inicio = None
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for linea in islice(f, max_lineas_cabecera):
+                if not linea.startswith("#"):
+                    break
+                match = fecha_regex.search(linea)
+                if match:
+                    inicio = f"{match.group(1)}T{match.group(2)}"
+                match = campo_regex.match(linea)
+                if match:
+                    campos[match.group(1)] = match.group(2)
+    except Exception as e:
+        print(f"Error al leer {file_path}: {e}")
+        return None
+    return campos, inicio
+
+
+def _buscar_campo(campos, *prefijos):
+    """Valor del primer campo cuya clave empieza con alguno de los prefijos."""
+    for clave, valor in campos.items():
+        if clave.upper().startswith(prefijos):
+            return valor or None
+    return None
+
+
+def _fila(file_path, firma):
+    resultado = leer_cabecera(file_path)
+    if resultado is None:
+        return None
+    campos, inicio = resultado
+    nombre = os.path.basename(file_path)
+    match = red_regex.match(nombre)
+    red = match.group(1) if match else _buscar_campo(campos, "RED")
+    estacion = _buscar_campo(campos, "ESTACIÓN", "ESTACION", "CÓDIGO DE ESTACIÓN")
+    return (file_path, nombre, red, estacion, inicio, firma[0], firma[1],
+            json.dumps(campos, ensure_ascii=False))
+
+
+def conectar(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+def construir_catalogo(local_base_path, db_path, network_code=network_code, max_workers=8):
+    """Actualiza el catálogo con los registros nuevos o modificados.
+
+    Los archivos con el mismo tamaño y mtime que en el catálogo no se
+    vuelven a leer y los de la red que ya no existen se eliminan.
+    Devuelve (agregados, eliminados).
+    """
+    conn = conectar(db_path)
+    conocidos = {
+        fila["ruta"]: (fila["tamano"], fila["mtime_ns"])
+        for fila in conn.execute("SELECT ruta, tamano, mtime_ns FROM registros")
+    }
+
+    pendientes = []
+    vistos = set()
+    for root, _, files in os.walk(local_base_path):
+        for file in files:
+            if not (file.startswith(f"RED_{network_code}") and file.endswith(".txt")):
+                continue
+            file_path = os.path.join(root, file)
+            st = os.stat(file_path)
+            firma = (st.st_size, st.st_mtime_ns)
+            vistos.add(file_path)
+            if conocidos.get(file_path) != firma:
+                pendientes.append((file_path, firma))
+
+    # La lectura de cabeceras es I/O, se reparte en un pool de hilos
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        filas = [f for f in executor.map(lambda p: _fila(*p), pendientes) if f is not None]
+
+    # Solo se eliminan los registros de la carpeta recorrida y de la misma
+    # red: el catálogo puede tener otras redes bajo la misma carpeta
+    base = os.path.join(local_base_path, "")
+    prefijo = f"RED_{network_code}"
+    eliminados = [(ruta,) for ruta in conocidos
+                  if ruta.startswith(base) and ruta not in vistos
+                  and os.path.basename(ruta).startswith(prefijo)]
+
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO registros VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+        conn.executemany("DELETE FROM registros WHERE ruta = ?", eliminados)
+    conn.close()
+    return len(filas), len(eliminados)
+
+
+def buscar(db_path, red=None, estacion=None, desde=None, hasta=None):
+    """Registros filtrados por red, estación y rango de fechas de inicio.
+
+    desde y hasta son cadenas ISO (yyyy-mm-dd o yyyy-mm-ddThh:mm:ss);
+    hasta con solo la fecha incluye todo ese día.
+    """
+    condiciones, parametros = [], []
+    if red:
+        condiciones.append("red = ?")
+        parametros.append(red)
+    if estacion:
+        condiciones.append("estacion = ?")
+        parametros.append(estacion)
+    if desde:
+        condiciones.append("inicio >= ?")
+        parametros.append(desde)
+    if hasta:
+        condiciones.append("inicio <= ?")
+        parametros.append(hasta if "T" in hasta else f"{hasta}T23:59:59")
+
+    consulta = "SELECT ruta, nombre, red, estacion, inicio, cabecera FROM registros"
+    if condiciones:
+        consulta += " WHERE " + " AND ".join(condiciones)
+    consulta += " ORDER BY inicio"
+
+    conn = conectar(db_path)
+    filas = [dict(fila, cabecera=json.loads(fila["cabecera"])) for fila in conn.execute(consulta, parametros)]
+    conn.close()
+    return filas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Catálogo SQLite de las cabeceras de los registros .txt.')
+    parser.add_argument('--db', default='catalogo_txt.sqlite',
+                        help='Archivo SQLite del catálogo (default: catalogo_txt.sqlite)')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    p_construir = subparsers.add_parser('construir', help='Agrega o actualiza los registros de una carpeta')
+    p_construir.add_argument('path', help='Carpeta base con los registros descargados')
+    p_construir.add_argument('--network', default=network_code,
+                             help=f'Código de red (default: {network_code})')
+    p_construir.add_argument('--workers', type=int, default=8,
+                             help='Número de hilos de lectura (default: 8)')
+
+    p_buscar = subparsers.add_parser('buscar', help='Lista los registros que cumplen los filtros')
+    p_buscar.add_argument('--red')
+    p_buscar.add_argument('--estacion')
+    p_buscar.add_argument('--desde', help='Fecha de inicio mínima (yyyy-mm-dd)')
+    p_buscar.add_argument('--hasta', help='Fecha de inicio máxima (yyyy-mm-dd)')
+
+    args = parser.parse_args()
+    if args.comando == 'construir':
+        agregados, eliminados = construir_catalogo(args.path, args.db, args.network, args.workers)
+        print(f"{agregados} registros agregados o actualizados, {eliminados} eliminados.")
+    else:
+        filas = buscar(args.db, args.red, args.estacion, args.desde, args.hasta)
+        for fila in filas:
+            print(f"{fila['inicio']}  {fila['red']}  {fila['estacion']}  {fila['ruta']}")
+        print(f"{len(filas)} registros.")
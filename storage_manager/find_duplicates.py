@@ -0,0 +1,299 @@
+import os
+import re
+import csv
+import sqlite3
+import hashlib
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Bytes que se leen del inicio y del final para el hash parcial
+partial_size = 64 * 1024
+# Tamaño del buffer para el hash completo
+buffer_size = 4 * 1024 * 1024
+
+# Sufijo _1, _2... que agrega move_out_folder al resolver colisiones
+copia_regex = re.compile(r"_\d+$")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    ruta TEXT PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    parcial TEXT,
+    completo TEXT
+);
+"""
+
+
+class HashCache:
+    """Caché SQLite de hashes por (ruta, tamaño, mtime).
+
+    Un archivo modificado cambia de tamaño o mtime y su entrada deja de
+    ser válida, por lo que volver a escanear casi no lee datos.
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(ESQUEMA)
+        self.entries = {
+            ruta: (tamano, mtime_ns, parcial, completo)
+            for ruta, tamano, mtime_ns, parcial, completo in self.conn.execute("SELECT * FROM hashes")
+        }
+        self._pendientes = {}
+
+    def get(self, ruta, tamano, mtime_ns, campo):
+        entry = self.entries.get(ruta)
+        if entry is None or entry[0] != tamano or entry[1] != mtime_ns:
+            return None
+        return entry[2] if campo == 'parcial' else entry[3]
+
+    def put(self, ruta, tamano, mtime_ns, parcial=None, completo=None):
+        entry = self.entries.get(ruta)
+        if entry is not None and entry[0] == tamano and entry[1] == mtime_ns:
+            parcial = parcial or entry[2]
+            completo = completo or entry[3]
+        self.entries[ruta] = (tamano, mtime_ns, parcial, completo)
+        self._pendientes[ruta] = (ruta, tamano, mtime_ns, parcial, completo)
+
+    def save(self):
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)",
+                                  self._pendientes.values())
+        self._pendientes.clear()
+
+    def close(self):
+        self.save()
+        self.conn.close()
+
+
+def scan_files(paths, min_size=1):
+    """Recorre las carpetas con scandir y devuelve (ruta, tamaño, mtime_ns, (dev, inode)).
+
+    El inodo es None si scandir no lo entrega; se resuelve después con
+    _inodo() solo para los archivos que comparten tamaño.
+    """
+    archivos = []
+    pila = list(paths)
+    while pila:
+        carpeta = pila.pop()
+        try:
+            with os.scandir(carpeta) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pila.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size >= min_size:
+                            # En Windows DirEntry.stat() deja st_ino/st_dev en 0
+                            inodo = (st.st_dev, st.st_ino) if st.st_ino else None
+                            archivos.append((entry.path, st.st_size, st.st_mtime_ns, inodo))
+        except OSError as e:
+            print(f"Error al leer {carpeta}: {e}")
+    return archivos
+
+
+def _inodo(archivo):
+    """(dev, inode) del archivo; en Windows requiere un os.stat() completo."""
+    ruta, _, _, inodo = archivo
+    if inodo is not None:
+        return inodo
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return ruta
+    # Sin inodo real no se puede saber si son hard links: la ruta es la clave
+    return (st.st_dev, st.st_ino) if st.st_ino else ruta
+
+
+def partial_hash(file_path, size):
+    """Hash del inicio y del final del archivo (el archivo completo si es pequeño)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        if size <= 2 * partial_size:
+            h.update(f.read())
+        else:
+            h.update(f.read(partial_size))
+            f.seek(-partial_size, os.SEEK_END)
+            h.update(f.read(partial_size))
+    return h.hexdigest()
+
+
+def full_hash(file_path):
+    """Hash completo leyendo con un buffer grande reutilizado."""
+    h = hashlib.blake2b(digest_size=32)
+    buffer = bytearray(buffer_size)
+    vista = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            h.update(vista[:n])
+    return h.hexdigest()
+
+
+def _hash_grupos(grupos, campo, funcion, cache, max_workers):
+    """Calcula (o toma de la caché) el hash de todos los archivos de los grupos.
+
+    Devuelve los nuevos grupos con más de un archivo, subdivididos por hash.
+    """
+    pendientes = []
+    resultados = {}
+    for grupo in grupos:
+        for archivo in grupo:
+            ruta, tamano, mtime_ns, _ = archivo
+            valor = cache.get(ruta, tamano, mtime_ns, campo) if cache else None
+            if valor is None:
+                pendientes.append(archivo)
+            else:
+                resultados[ruta] = valor
+
+    def calcular(archivo):
+        ruta, tamano, _, _ = archivo
+        try:
+            return funcion(ruta, tamano) if campo == 'parcial' else funcion(ruta)
+        except OSError as e:
+            print(f"Error al leer {ruta}: {e}")
+            return None
+
+    # La lectura es I/O y hashlib libera el GIL, se reparte en un pool de hilos
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for archivo, valor in zip(pendientes, executor.map(calcular, pendientes)):
+            if valor is None:
+                continue
+            ruta, tamano, mtime_ns, _ = archivo
+            resultados[ruta] = valor
+            if cache:
+                cache.put(ruta, tamano, mtime_ns, **{campo: valor})
+
+    nuevos = []
+    for grupo in grupos:
+        por_hash = defaultdict(list)
+        for archivo in grupo:
+            if archivo[0] in resultados:
+                por_hash[resultados[archivo[0]]].append(archivo)
+        nuevos.extend(g for g in por_hash.values() if len(g) > 1)
+    return nuevos, resultados
+
+
+def find_duplicates(paths, cache_path=None, min_size=1, max_workers=8):
+    """Devuelve los grupos de archivos idénticos byte a byte.
+
+    Etapas: tamaño → hash parcial (inicio y final) → hash completo; cada
+    etapa solo procesa los candidatos que sobrevivieron a la anterior.
+    Los hard links a un mismo inodo cuentan como un solo archivo. Cada
+    grupo es (hash, tamaño, [rutas]).
+    """
+    cache = HashCache(cache_path) if cache_path else None
+
+    por_tamano = defaultdict(list)
+    for archivo in scan_files(paths, min_size):
+        por_tamano[archivo[1]].append(archivo)
+
+    # Descarta rutas que ya apuntan al mismo inodo (solo entre candidatos)
+    grupos = []
+    for candidatos in por_tamano.values():
+        if len(candidatos) < 2:
+            continue
+        por_inodo = {}
+        for archivo in candidatos:
+            por_inodo.setdefault(_inodo(archivo), archivo)
+        if len(por_inodo) > 1:
+            grupos.append(list(por_inodo.values()))
+
+    try:
+        grupos, parciales = _hash_grupos(grupos, 'parcial', partial_hash, cache, max_workers)
+        # Los archivos pequeños ya se leyeron completos en el hash parcial
+        pequenos = [g for g in grupos if g[0][1] <= 2 * partial_size]
+        grandes = [g for g in grupos if g[0][1] > 2 * partial_size]
+        grandes, completos = _hash_grupos(grandes, 'completo', full_hash, cache, max_workers)
+    finally:
+        if cache:
+            cache.close()
+
+    duplicados = []
+    for grupo in pequenos:
+        duplicados.append((parciales[grupo[0][0]], grupo[0][1], [a[0] for a in grupo]))
+    for grupo in grandes:
+        duplicados.append((completos[grupo[0][0]], grupo[0][1], [a[0] for a in grupo]))
+    return duplicados
+
+
+def _orden_conservar(ruta):
+    """Prioridad para elegir el original: sin sufijo _N, más antiguo, ruta más corta."""
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    try:
+        mtime = os.stat(ruta).st_mtime_ns
+    except OSError:
+        mtime = 0
+    return bool(copia_regex.search(nombre)), mtime, len(ruta), ruta
+
+
+def plan_duplicates(duplicados, accion='link'):
+    """Plan (hash, tamaño, conservar, ruta, acción) con un original por grupo."""
+    plan = []
+    for valor, tamano, rutas in duplicados:
+        rutas = sorted(rutas, key=_orden_conservar)
+        original = rutas[0]
+        for ruta in rutas[1:]:
+            plan.append((valor, tamano, original, ruta, accion))
+    return plan
+
+
+def write_report(plan, output_csv):
+    with open(output_csv, mode='w', newline='', encoding='utf-8-sig') as csv_file:
+        writer = csv.writer(csv_file, delimiter=';')
+        writer.writerow(['hash', 'tamaño', 'conservar', 'duplicado', 'acción'])
+        writer.writerows(plan)
+    liberables = sum(fila[1] for fila in plan)
+    print(f"Reporte generado en: {output_csv} ({len(plan)} duplicados, "
+          f"{liberables / 1024 ** 2:.1f} MB recuperables)")
+
+
+def _apply(fila):
+    _, _, original, ruta, accion = fila
+    try:
+        if accion == 'delete':
+            os.remove(ruta)
+        else:
+            # Enlace temporal + replace: el duplicado nunca queda ausente
+            tmp = f"{ruta}.dup_tmp"
+            os.link(original, tmp)
+            os.replace(tmp, ruta)
+        return True
+    except Exception as e:
+        print(f"Error al procesar {ruta}: {e}")
+        return False
+
+
+def execute_plan(plan, max_workers=8):
+    """Reemplaza los duplicados por hard links o los elimina según el plan."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(_apply, plan))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Busca archivos duplicados byte a byte.')
+    parser.add_argument('paths', nargs='+', help='Carpetas a revisar')
+    parser.add_argument('--report', default='duplicados.csv',
+                        help='CSV con el plan (default: duplicados.csv)')
+    parser.add_argument('--cache', default='.duplicados_cache.sqlite',
+                        help='Caché de hashes (default: .duplicados_cache.sqlite)')
+    parser.add_argument('--min-size', type=int, default=1,
+                        help='Tamaño mínimo en bytes (default: 1)')
+    parser.add_argument('--action', choices=['link', 'delete'], default='link',
+                        help='Acción del plan: hard link o eliminar (default: link)')
+    parser.add_argument('--execute', action='store_true',
+                        help='Aplica el plan; sin esta opción solo se genera el reporte')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Número de hilos de lectura (default: 8)')
+
+    args = parser.parse_args()
+    duplicados = find_duplicates(args.paths, args.cache, args.min_size, args.workers)
+    plan = plan_duplicates(duplicados, args.action)
+    write_report(plan, args.report)
+    if args.execute:
+        print(f"{execute_plan(plan, args.workers)} archivos procesados.")
@@ -1,5 +1,8 @@
 import os
 import re
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
 
 # Ruta base donde están los archivos
 local_base_path = 'path/to/your/local/base/path'
@@ -8,15 +11,97 @@ group_to_keep = '3'
 # Patrón para extraer el último número antes del código
 pattern = re.compile(r"^(?:[\d-]+-)?(\d+)-([a-zA-Z0-9]+)\.pdf$")
 
-# Recorremos los archivos en la ruta
-for filename in os.listdir(local_base_path):
-    file_path = os.path.join(local_base_path, filename)
 
-    # Verificar si es un archivo PDF
-    if filename.lower().endswith(".pdf"):
-        match = pattern.match(filename)
+def plan_filter(local_base_path, group_to_keep=group_to_keep, pattern=pattern):
+    """Recorre la carpeta una sola vez y devuelve (conservar, eliminar).
+
+    Ambas listas contienen rutas completas de archivos PDF. Un PDF se elimina
+    si no cumple el formato o si su grupo no es group_to_keep.
+    """
+    conservar = []
+    eliminar = []
+
+    # scandir evita un stat adicional por archivo respecto a listdir + join
+    with os.scandir(local_base_path) as entries:
+        for entry in entries:
+            # Verificar si es un archivo PDF
+            if not entry.name.lower().endswith(".pdf") or not entry.is_file():
+                continue
+
+            match = pattern.match(entry.name)
+            if match and match.group(1) == group_to_keep:
+                conservar.append(entry.path)
+            else:
+                eliminar.append(entry.path)
+
+    return conservar, eliminar
 
-        # Si no cumple el formato o num no es group_to_keep, eliminar el archivo
-        if not match or match.group(1) != group_to_keep:
+
+def _remove(file_path, quarantine_dir=None):
+    try:
+        if quarantine_dir:
+            shutil.move(file_path, os.path.join(quarantine_dir, os.path.basename(file_path)))
+        else:
             os.remove(file_path)
-            print(f"Eliminado: {filename}")
+        return True
+    except Exception as e:
+        print(f"Error al eliminar {os.path.basename(file_path)}: {e}")
+        return False
+
+
+def execute_plan(eliminar, quarantine_dir=None, max_workers=8):
+    """Elimina (o mueve a cuarentena) los archivos del plan en un pool de hilos.
+
+    Devuelve el número de archivos procesados correctamente.
+    """
+    if quarantine_dir:
+        os.makedirs(quarantine_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultados = list(executor.map(lambda path: _remove(path, quarantine_dir), eliminar))
+
+    return sum(resultados)
+
+
+def filter_pdfs(local_base_path, group_to_keep=group_to_keep, pattern=pattern,
+                dry_run=False, quarantine_dir=None, max_workers=8):
+    """Conserva solo los PDF del grupo indicado y devuelve un resumen."""
+    conservar, eliminar = plan_filter(local_base_path, group_to_keep, pattern)
+
+    if dry_run:
+        for file_path in eliminar:
+            print(f"Por eliminar: {os.path.basename(file_path)}")
+        procesados = 0
+    else:
+        procesados = execute_plan(eliminar, quarantine_dir, max_workers)
+
+    resumen = {
+        'conservados': len(conservar),
+        'por_eliminar': len(eliminar),
+        'eliminados': procesados if not quarantine_dir else 0,
+        'en_cuarentena': procesados if quarantine_dir else 0,
+        'errores': 0 if dry_run else len(eliminar) - procesados,
+    }
+    return resumen
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Conserva solo los PDF de un grupo y elimina el resto.')
+    parser.add_argument('path', nargs='?', default=local_base_path,
+                        help='Carpeta con los PDF de eventos')
+    parser.add_argument('--group', default=group_to_keep,
+                        help=f'Grupo a conservar (default: {group_to_keep})')
+    parser.add_argument('--quarantine',
+                        help='Mover a esta carpeta en lugar de eliminar')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Número de hilos para eliminar (default: 8)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Muestra el plan sin eliminar')
+
+    args = parser.parse_args()
+    resumen = filter_pdfs(args.path, args.group, dry_run=args.dry_run,
+                          quarantine_dir=args.quarantine, max_workers=args.workers)
+    for clave, valor in resumen.items():
+        print(f"{clave}: {valor}")
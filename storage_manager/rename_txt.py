@@ -1,20 +1,31 @@
 import os
 import re
 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 # Ruta local donde se descargaron los archivos
 local_base_path = 'path/to/your/local/base/path'
 network_code = 'RA'
 
+# Línea de la cabecera que contiene la hora de inicio
+linea_fecha = 20
+
 # Expresión regular para extraer la fecha de la línea 20
 fecha_regex = re.compile(r"# HORA INICIO \(UTC-0\): (\d{4}-\d{2}-\d{2})T(\d{2}:\d{2}:\d{2})")
 
+# Sufijo yyyy_mm_dd_hh_mm_ss que deja un renombrado previo
+sufijo_regex = re.compile(r"_\d{4}_\d{2}_\d{2}_\d{2}_\d{2}_\d{2}\.txt$")
+
+
 def get_date_from_txt(file_path):
-    """Lee la línea 20 del archivo y extrae la fecha y hora."""
+    """Lee solo hasta la línea 20 del archivo y extrae la fecha y hora."""
     try:
         with open(file_path, "r", encoding="utf-8") as f:
-            lineas = f.readlines()
-            if len(lineas) >= 20:
-                match = fecha_regex.search(lineas[19])  # Línea 20 (índice 19)
+            # islice detiene la lectura en la cabecera sin cargar todo el registro
+            linea = next(islice(f, linea_fecha - 1, linea_fecha), None)
+            if linea:
+                match = fecha_regex.search(linea)
                 if match:
                     fecha = match.group(1).replace("-", "_")  # yyyy_mm_dd
                     hora = match.group(2).replace(":", "_")  # hh_mm_ss
@@ -23,23 +34,80 @@ def get_date_from_txt(file_path):
         print(f"Error al leer {file_path}: {e}")
     return None
 
-def rename_txt(local_base_path):
-    """Recorre las subcarpetas y renombra los archivos agregando la fecha."""
+
+def plan_rename(local_base_path, network_code=network_code, max_workers=8):
+    """Genera la lista de renombrados (origen, destino) sin modificar archivos.
+
+    Los archivos que ya tienen el sufijo de fecha se omiten, por lo que
+    ejecutar el renombrado varias veces no altera el resultado.
+    """
+    candidatos = []
     for root, _, files in os.walk(local_base_path):
         for file in files:
-            if file.startswith(f"RED_{network_code}") and file.endswith(".txt"):
-                file_path = os.path.join(root, file)
-                nueva_fecha = get_date_from_txt(file_path)
-                
-                if nueva_fecha:
-                    nuevo_nombre = f"{file[:-4]}_{nueva_fecha}.txt"  # Agregar fecha antes de .txt
-                    nuevo_path = os.path.join(root, nuevo_nombre)
-                    
-                    try:
-                        os.rename(file_path, nuevo_path)
-                        print(f"Renombrado: {file} → {nuevo_nombre}")
-                    except Exception as e:
-                        print(f"Error al renombrar {file}: {e}")
-
-# Ejecutar el renombrado
-rename_txt(local_base_path)
+            if not (file.startswith(f"RED_{network_code}") and file.endswith(".txt")):
+                continue
+            if sufijo_regex.search(file):
+                continue  # Ya renombrado
+            candidatos.append(os.path.join(root, file))
+
+    # La lectura de cabeceras es I/O, se reparte en un pool de hilos
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fechas = list(executor.map(get_date_from_txt, candidatos))
+
+    plan = []
+    for file_path, nueva_fecha in zip(candidatos, fechas):
+        if not nueva_fecha:
+            continue
+        root, file = os.path.split(file_path)
+        nuevo_nombre = f"{file[:-4]}_{nueva_fecha}.txt"  # Agregar fecha antes de .txt
+        nuevo_path = os.path.join(root, nuevo_nombre)
+        if os.path.exists(nuevo_path):
+            print(f"Omitido (destino existente): {nuevo_path}")
+            continue
+        plan.append((file_path, nuevo_path))
+    return plan
+
+
+def _rename(origen, destino):
+    try:
+        os.rename(origen, destino)
+        print(f"Renombrado: {os.path.basename(origen)} → {os.path.basename(destino)}")
+        return True
+    except Exception as e:
+        print(f"Error al renombrar {os.path.basename(origen)}: {e}")
+        return False
+
+
+def rename_txt(local_base_path, network_code=network_code, dry_run=False, max_workers=8):
+    """Recorre las subcarpetas y renombra los archivos agregando la fecha.
+
+    Con dry_run=True solo imprime el plan. Devuelve la lista (origen, destino).
+    """
+    plan = plan_rename(local_base_path, network_code, max_workers)
+
+    if dry_run:
+        for origen, destino in plan:
+            print(f"Plan: {os.path.basename(origen)} → {os.path.basename(destino)}")
+        return plan
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda par: _rename(*par), plan))
+    return plan
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Agrega la fecha de inicio al nombre de los registros .txt.')
+    parser.add_argument('path', nargs='?', default=local_base_path,
+                        help='Carpeta base con los registros descargados')
+    parser.add_argument('--network', default=network_code,
+                        help=f'Código de red (default: {network_code})')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Número de hilos de lectura (default: 8)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Muestra el plan sin renombrar')
+
+    args = parser.parse_args()
+    plan = rename_txt(args.path, args.network, args.dry_run, args.workers)
+    print(f"{len(plan)} archivos {'por renombrar' if args.dry_run else 'procesados'}.")
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+
+def to_long(dataframes):
+    """Convierte el diccionario de hojas en una sola tabla larga.
+
+    Columnas: station, date, parameter, value. station y parameter son
+    categóricas y value es numérico (NaN si el dato no es un número).
+    """
+    parts = []
+    for station, df in dataframes.items():
+        n, m = df.shape[0], df.shape[1] - 1
+        if n == 0 or m <= 0:
+            continue
+        dates = pd.to_datetime(df.iloc[:, 0], errors='coerce').to_numpy()
+        parts.append(pd.DataFrame({
+            'station': np.full(n * m, station, dtype=object),
+            'date': np.tile(dates, m),
+            'parameter': np.repeat(np.asarray(df.columns[1:], dtype=object), n),
+            # Orden por columnas: cada parámetro ocupa un bloque contiguo de n filas
+            'value': df.iloc[:, 1:].to_numpy(dtype=object).ravel(order='F'),
+        }))
+
+    long_df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=['station', 'date', 'parameter', 'value'])
+    long_df['value'] = pd.to_numeric(long_df['value'], errors='coerce')
+    long_df['station'] = long_df['station'].astype('category')
+    long_df['parameter'] = long_df['parameter'].astype('category')
+    return long_df
+
+
+def prepare_limits(interest_df):
+    """Tabla parameter, unit, limit (numérico), un registro por parámetro."""
+    limits = interest_df[['sample', 'unit', 'limit']].rename(columns={'sample': 'parameter'})
+    limits = limits.assign(limit=pd.to_numeric(limits['limit'], errors='coerce'))
+    # Igual que la búsqueda original: se usa la primera fila de cada parámetro
+    return limits.drop_duplicates('parameter', keep='first')
+
+
+def attach_limits(long_df, limits):
+    """Une los límites a la tabla larga con un solo merge."""
+    merged = long_df.merge(limits, on='parameter', how='left')
+    merged['parameter'] = merged['parameter'].astype(long_df['parameter'].dtype)
+    return merged
+
+
+def find_exceedances(long_df, limits):
+    """Devuelve las excedencias con las mismas columnas que analyze_limits."""
+    merged = attach_limits(long_df, limits)
+    mask = merged['value'].notna() & merged['limit'].notna() & (merged['value'] > merged['limit'])
+    return (
+        merged.loc[mask, ['station', 'parameter', 'date', 'value', 'limit']]
+        .rename(columns={'station': 'DataFrame', 'parameter': 'Sample', 'date': 'Date',
+                         'value': 'Exceeded Value', 'limit': 'Limit'})
+        .reset_index(drop=True)
+    )
+
+
+def count_exceedances(summary_table):
+    """Cuenta las excedencias por hoja (estación) y parámetro."""
+    return (summary_table.groupby(['DataFrame', 'Sample'], observed=True)
+            .size().reset_index(name='Count'))
+
+
+def station_summary(long_df, limits):
+    """Resumen por estación y parámetro: registros, excedencias, máximo y última fecha."""
+    merged = attach_limits(long_df.dropna(subset=['value']), limits)
+    merged['exceeded'] = merged['value'] > merged['limit']
+    return (
+        merged.groupby(['station', 'parameter'], observed=True)
+        .agg(records=('value', 'size'), exceedances=('exceeded', 'sum'),
+             max_value=('value', 'max'), limit=('limit', 'first'), last_date=('date', 'max'))
+        .reset_index()
+    )
@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+
+def _engine():
+    """Motor de lectura más rápido disponible (calamine o openpyxl en modo solo lectura)."""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return 'openpyxl'
+
+
+def workbook_hash(file_path, block_size=1 << 20):
+    """Calcula el SHA-1 del contenido del libro Excel."""
+    h = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _to_parquet_safe(df):
+    """Prepara un DataFrame con tipos mixtos para Parquet.
+
+    Las etiquetas de columna se guardan aparte y las columnas object con
+    valores mixtos se pasan a texto (los nulos se conservan).
+    """
+    labels = [None if pd.isna(c) else str(c) for c in df.columns]
+    df = df.set_axis([str(i) for i in range(df.shape[1])], axis=1).infer_objects()
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].map(lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v))
+    return df, labels
+
+
+def normalize_sheet(df, columns_to_remove=(1, 2), row=0):
+    """Quita columnas, transpone y nombra las columnas según una fila en una sola pasada.
+
+    Equivale a remove_columns + transpose_df + clean_columns del notebook,
+    pero sin modificar el DataFrame de entrada.
+    """
+    t = df.drop(columns=list(columns_to_remove), errors='ignore').T.reset_index(drop=True)
+    return t.iloc[1:].set_axis(t.iloc[row].values, axis=1)
+
+
+def read_sheets(file_path, sheet_to_exclude=(), start_cell=(0, 0)):
+    """Lee todas las hojas del libro en una sola llamada, sin encabezados."""
+    sheets = pd.read_excel(file_path, sheet_name=None, header=None, engine=_engine())
+    start_row, start_col = start_cell
+    return {
+        name: df.iloc[start_row:, start_col:]
+        for name, df in sheets.items() if name not in sheet_to_exclude
+    }
+
+
+def load_water_quality(file_path, sheet_to_exclude=(), start_cell=(0, 0),
+                       columns_of_interest=(0, 1, 2), columns_to_remove=(1, 2), row=0,
+                       cache_dir='./var/cache'):
+    """Devuelve (dataframes, interest_df) leyendo el libro solo si cambió.
+
+    dataframes son las hojas ya normalizadas (transpuestas y con nombres de
+    parámetros como columnas) e interest_df la tabla de columnas de interés
+    (muestra, unidad, límite) de todas las hojas, igual que separate_columns.
+    Ambos se guardan como Parquet en cache_dir/<hash del libro>/.
+    """
+    cache_path = os.path.join(cache_dir, workbook_hash(file_path))
+    manifest_path = os.path.join(cache_path, 'manifest.json')
+    params = {
+        'sheet_to_exclude': list(sheet_to_exclude), 'start_cell': list(start_cell),
+        'columns_of_interest': list(columns_of_interest),
+        'columns_to_remove': list(columns_to_remove), 'row': row,
+    }
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['params'] == params:
+            return _read_cache(cache_path, manifest)
+
+    raw = read_sheets(file_path, sheet_to_exclude, start_cell)
+
+    interest_df = pd.concat(
+        [df.iloc[:, :len(columns_of_interest)].set_axis(list(columns_of_interest), axis=1)
+         for df in raw.values()],
+        ignore_index=True,
+    )
+    dataframes = {name: normalize_sheet(df, columns_to_remove, row) for name, df in raw.items()}
+
+    # Se devuelve lo leído de la caché para que la primera ejecución y las
+    # siguientes entreguen exactamente los mismos tipos
+    manifest = _write_cache(cache_path, manifest_path, params, dataframes, interest_df)
+    return _read_cache(cache_path, manifest)
+
+
+def _write_cache(cache_path, manifest_path, params, dataframes, interest_df):
+    os.makedirs(cache_path, exist_ok=True)
+    manifest = {'params': params, 'sheets': []}
+
+    for i, (name, df) in enumerate(dataframes.items()):
+        safe, labels = _to_parquet_safe(df)
+        file_name = f"sheet_{i:03d}.parquet"
+        safe.to_parquet(os.path.join(cache_path, file_name))
+        manifest['sheets'].append({'name': name, 'file': file_name, 'columns': labels})
+
+    safe, _ = _to_parquet_safe(interest_df)
+    safe.to_parquet(os.path.join(cache_path, 'interest.parquet'))
+    manifest['interest_columns'] = list(interest_df.columns)
+
+    # El manifiesto se escribe al final: solo existe si la caché está completa
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+
+def _read_cache(cache_path, manifest):
+    dataframes = {}
+    for sheet in manifest['sheets']:
+        df = pd.read_parquet(os.path.join(cache_path, sheet['file']))
+        dataframes[sheet['name']] = df.set_axis(sheet['columns'], axis=1)
+
+    interest_df = pd.read_parquet(os.path.join(cache_path, 'interest.parquet'))
+    interest_df = interest_df.set_axis(manifest['interest_columns'], axis=1)
+    return dataframes, interest_df
@@ -0,0 +1,155 @@
+import os
+import hashlib
+import fitz  # PyMuPDF
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+
+def collect_plots(subfolders, input_dir='var'):
+    """Lista (ruta_png, poza, sample) de los gráficos, sin copiarlos a otra carpeta.
+
+    Se ordena por '{poza}_{sample}', el mismo orden que tenían las copias en output/.
+    """
+    plots = []
+    for subfolder in subfolders:
+        subfolder_path = os.path.join(input_dir, subfolder)
+        if not os.path.isdir(subfolder_path):
+            print(f"La subcarpeta '{subfolder}' no existe en el directorio principal.")
+            continue
+        for file in os.listdir(subfolder_path):
+            if file.endswith('.png'):
+                plots.append((os.path.join(subfolder_path, file), os.path.splitext(file)[0], subfolder))
+    return sorted(plots, key=lambda p: f"{p[1]}_{p[2]}")
+
+
+def image_rect_size(img_size, page_size):
+    """Tamaño (pt) con el que se inserta la imagen: 70 % del espacio de la página."""
+    img_width, img_height = img_size
+    page_width, page_height = page_size
+    scale = min(page_width / img_width, page_height / img_height) * 0.7
+    return int(img_width * scale) * 1.05, int(img_height * scale) * 1.05
+
+
+def prepare_image(png_path, page_size, target_dpi=150, quality=85, cache_dir='./var/cache/pdf'):
+    """Reduce la imagen al DPI objetivo y la guarda como JPEG en caché.
+
+    Devuelve (ruta_jpeg, tamaño_del_rectángulo_en_pt). La clave de caché
+    combina el contenido del PNG con los parámetros de salida.
+    """
+    with open(png_path, 'rb') as f:
+        data = f.read()
+    key = hashlib.sha1(data + repr((tuple(page_size), target_dpi, quality)).encode()).hexdigest()
+    jpeg_path = os.path.join(cache_dir, f"{key}.jpg")
+
+    with Image.open(png_path) as img:
+        rect_size = image_rect_size(img.size, page_size)
+        if not os.path.exists(jpeg_path):
+            # Píxeles necesarios para el tamaño impreso al DPI objetivo
+            max_px = (int(rect_size[0] / 72 * target_dpi), int(rect_size[1] / 72 * target_dpi))
+            img = img.convert("RGB")
+            img.thumbnail(max_px, Image.LANCZOS)
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{jpeg_path}.tmp"
+            img.save(tmp_path, "JPEG", quality=quality, optimize=True)
+            os.replace(tmp_path, jpeg_path)
+
+    return jpeg_path, rect_size
+
+
+def split_text(text, max_length):
+    """Divide el texto en líneas de a lo sumo max_length caracteres."""
+    words = text.split(' ')
+    current_line = ""
+    lines = []
+    for word in words:
+        if len(current_line + word) <= max_length:
+            current_line += word + " "
+        else:
+            lines.insert(0, current_line.strip())  # Insertar al inicio para mantener el orden correcto
+            current_line = word + " "
+    lines.insert(0, current_line.strip())  # Insertar la última línea al inicio
+    return lines
+
+
+def _add_page(output, base_pdf, template_rect, jpeg_path, rect_size, text_line, numbering_text,
+              max_line_length):
+    page_width, page_height = template_rect.width, template_rect.height
+
+    # Crear una nueva página usando la plantilla
+    new_page = output.new_page(width=page_width, height=page_height)
+    new_page.show_pdf_page(new_page.rect, base_pdf, 0)
+
+    # Insertar la imagen centrada en la página
+    new_img_width, new_img_height = rect_size
+    img_x = (page_width - new_img_width) / 2
+    img_y = (page_height - new_img_height) / 2
+    new_page.insert_image(fitz.Rect(img_x, img_y, img_x + new_img_width, img_y + new_img_height),
+                          filename=jpeg_path)
+
+    # Añadir el texto centrado {poza}: {title} / {sample} en varias líneas sin espaciado
+    text_size = 6
+    lines = split_text(text_line, max_line_length)
+    for idx, line in enumerate(lines):
+        text_width = fitz.get_text_length(line, fontsize=text_size)
+        text_x = (page_width - text_width) / 2 + 95
+        text_y = page_height - 86 - (12 * (len(lines) - idx - 1))
+        new_page.insert_text((text_x, text_y), line, fontsize=text_size, color=(0, 0, 0))
+
+    # Añadir la numeración centrada
+    numbering_fontsize = 16
+    numbering_width = fitz.get_text_length(numbering_text, fontsize=numbering_fontsize)
+    numbering_x = (page_width - numbering_width) / 2 + 322
+    numbering_y = page_height - 90
+    new_page.insert_text((numbering_x, numbering_y), numbering_text, fontsize=numbering_fontsize,
+                         color=(0, 0, 0))
+
+
+def assemble_pdf(sample_pdf, plots, output_pdf, title_dict, max_line_length=250, target_dpi=150,
+                 quality=85, max_workers=4, pages_per_batch=25, section='5',
+                 cache_dir='./var/cache/pdf'):
+    """Arma el PDF del reporte a partir de la lista de gráficos.
+
+    Las imágenes se preparan (en paralelo con max_workers > 1) con
+    prepare_image y las páginas se escriben en lotes con guardado
+    incremental, de modo que en memoria solo está el lote actual. Sin
+    gráficos no se toca output_pdf y se devuelve None.
+    """
+    if not plots:
+        print("No hay gráficos para el reporte; se conserva el PDF existente.")
+        return None
+
+    base_pdf = fitz.open(sample_pdf)
+    template_rect = base_pdf.load_page(0).rect
+    page_size = (template_rect.width, template_rect.height)
+
+    def prepare(plot):
+        return prepare_image(plot[0], page_size, target_dpi, quality, cache_dir)
+
+    if max_workers and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            images = list(executor.map(prepare, plots))
+    else:
+        images = [prepare(plot) for plot in plots]
+
+    if os.path.exists(output_pdf):
+        os.remove(output_pdf)
+
+    output = fitz.open()
+    for i, ((_, poza, sample), (jpeg_path, rect_size)) in enumerate(zip(plots, images), start=1):
+        title = title_dict.get(poza, "Sin Título")
+        _add_page(output, base_pdf, template_rect, jpeg_path, rect_size,
+                  f"{poza}: {title} / {sample}", f"{section}.{i}", max_line_length)
+
+        # Volcar el lote al disco y continuar sobre el archivo guardado
+        if i % pages_per_batch == 0 or i == len(plots):
+            if os.path.exists(output_pdf):
+                output.save(output_pdf, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP,
+                            deflate=True)
+            else:
+                output.save(output_pdf, deflate=True)
+            output.close()
+            if i < len(plots):
+                output = fitz.open(output_pdf)
+
+    base_pdf.close()
+    return output_pdf
@@ -0,0 +1,212 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import matplotlib
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.dates import DateFormatter
+
+# Cambiar este valor invalida todos los gráficos guardados al modificar el estilo
+STYLE_VERSION = 1
+
+NA_CA_FOLDER = 'Concentración de Calcio (Ca) y Sodio (Na)'
+PH_COLUMN = 'pH in-situ'
+
+# Figura reutilizada por cada proceso del pool
+_figure = None
+
+
+def _init_worker():
+    """Backend sin pantalla solo en los procesos del pool, no en el kernel del notebook."""
+    matplotlib.use('Agg')
+
+
+def _new_axes():
+    """Devuelve un eje limpio sobre la figura del proceso, creándola una sola vez."""
+    global _figure
+    if _figure is None:
+        _figure = plt.figure(figsize=(10, 6))
+    else:
+        _figure.clf()
+    return _figure, _figure.add_subplot()
+
+
+def _annotate(ax, x, y, text, color, xy_factor=0.9):
+    ax.annotate(text, xy=(x, y * xy_factor), xytext=(5, 5), textcoords='offset points', color=color,
+                fontsize=10, bbox=dict(boxstyle="round,pad=0.3", edgecolor="none", facecolor="white"))
+
+
+def _draw_parameter(ax, task):
+    """Gráfico de un parámetro con su límite (LMP) o su promedio."""
+    dates, values = pd.to_datetime(task['dates']), task['values']
+    col, unit, limit = task['parameter'], task['unit'], task['limit']
+
+    ax.plot(dates, values, label=col, marker='o')
+    ax.set_ylabel(f"{col} ({unit})", fontsize=12)
+
+    max_value_exceeded = False
+    if pd.isna(limit):
+        # Si no hay un límite, graficar una línea de promedio
+        avg_value = values.mean()
+        ax.axhline(y=avg_value, color='blue', linestyle='--', label=f'Promedio: {avg_value:.2f} {unit}')
+    else:
+        ax.axhline(y=limit, color='red', linestyle='--', label=f'LMP: {limit} {unit}')
+        exceed_mask = values > limit
+        if exceed_mask.any():
+            k = np.flatnonzero(exceed_mask)[np.argmax(values[exceed_mask])]
+            ax.scatter(dates[k], values[k], color='red', zorder=5)
+            _annotate(ax, dates[k], values[k],
+                      f"Valor máx.:\n{values[k]:.2f} {unit}\n{dates[k].strftime('%d-%m-%y')}", 'red')
+            max_value_exceeded = True
+
+    # Mostrar el valor máximo solo si no se excedió el límite
+    if not max_value_exceeded:
+        k = int(np.argmax(values))
+        ax.scatter(dates[k], values[k], color='green', zorder=5)
+        _annotate(ax, dates[k], values[k],
+                  f"Valor máx.:\n{values[k]:.2f} {unit}\n{dates[k].strftime('%d-%m-%y')}", 'green')
+
+    # Anotación del último registro
+    annotation = (f"Último registro: {dates[-1].strftime('%d-%m-%y')}\n"
+                  f"Valor de registro: {values[-1]} {unit}")
+    ax.annotate(annotation, xy=(0, -0.07), xycoords='axes fraction', alpha=1,
+                fontsize=10, verticalalignment='top', horizontalalignment='left', color='black',
+                bbox=dict(boxstyle="round,pad=0.3", edgecolor="none", facecolor="none"))
+    ax.set_title(f"{task['station']}: {task['title']}")
+
+
+def _draw_ph(ax, task):
+    """Gráfico de pH in-situ con las líneas de 6 y 9 y sus extremos."""
+    dates, values = pd.to_datetime(task['dates']), task['values']
+    col = task['parameter']
+
+    ax.plot(dates, values, label=col, marker='o')
+    ax.set_ylabel(f"{col} (pH)", fontsize=12)
+    ax.axhline(y=6, color='lightseagreen', linestyle='--', label='pH = 6')
+    ax.axhline(y=9, color='steelblue', linestyle='--', label='pH = 9')
+
+    k = int(np.argmax(values))
+    ax.scatter(dates[k], values[k], color='black', zorder=5)
+    _annotate(ax, dates[k], values[k], f"Valor máx.:\n{values[k]:.2f}\n{dates[k].strftime('%d-%m-%y')}",
+              'black', 0.95)
+
+    k = int(np.argmin(values))
+    ax.scatter(dates[k], values[k], color='black', zorder=5)
+    _annotate(ax, dates[k], values[k], f"Valor mín.:\n{values[k]:.2f}\n{dates[k].strftime('%d-%m-%y')}",
+              'black', 1.0)
+    ax.set_title(f"{task['station']}: {col}")
+
+
+def _draw_na_ca(ax, task):
+    """Gráfico de calcio y sodio total de una estación."""
+    dates = pd.to_datetime(task['dates'])
+    ax.plot(dates, task['values'][0], label='Calcio total, Ca', color='steelblue', marker='o')
+    ax.plot(dates, task['values'][1], label='Sodio total, Na', color='lightseagreen', marker='x')
+    ax.set_title(f"{task['station']}: {task['title']}")
+    ax.set_ylabel('Concentración (mg/L)')
+
+
+_DRAWERS = {'parameter': _draw_parameter, 'ph': _draw_ph, 'na_ca': _draw_na_ca}
+
+
+def render(task):
+    """Dibuja y guarda un gráfico; se ejecuta dentro de los procesos del pool."""
+    fig, ax = _new_axes()
+    _DRAWERS[task['kind']](ax, task)
+
+    # Formato de fechas y labels en el eje X
+    ax.xaxis.set_major_formatter(DateFormatter("%d-%m-%y"))
+    ax.tick_params(axis='x', rotation=0)
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(task['output_file'], dpi=300)
+    return task['output_file']
+
+
+def task_hash(task):
+    """Hash del contenido que define un gráfico (datos, metadatos y estilo)."""
+    h = hashlib.sha1(str(STYLE_VERSION).encode())
+    for key in sorted(task):
+        value = task[key]
+        h.update(key.encode())
+        h.update(np.ascontiguousarray(value).tobytes() if isinstance(value, np.ndarray) else repr(value).encode())
+    return h.hexdigest()
+
+
+def build_tasks(dataframes, interest_df, titles, output_root='./var', cutoff_date='2021-01-01'):
+    """Prepara la lista de gráficos de todas las hojas.
+
+    Fechas, conversión numérica y máscaras se calculan una sola vez por hoja
+    y los límites se buscan en un diccionario en lugar de filtrar interest_df.
+    """
+    limits = interest_df.drop_duplicates('sample', keep='first').set_index('sample')
+    unit_by_sample = limits['unit'].to_dict()
+    limit_by_sample = pd.to_numeric(limits['limit'], errors='coerce').to_dict()
+    cutoff = pd.to_datetime(cutoff_date)
+
+    tasks = []
+    for name, df in dataframes.items():
+        dates = pd.to_datetime(df.iloc[:, 0], errors='coerce').to_numpy()
+        values = df.iloc[:, 1:].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        date_mask = dates >= np.datetime64(cutoff)
+        title = titles.get(name, name)
+
+        for j, col in enumerate(df.columns[1:]):
+            mask = date_mask & ~np.isnan(values[:, j])
+            if not mask.any():
+                continue
+            task = {'station': name, 'title': title, 'parameter': col,
+                    'dates': dates[mask], 'values': values[mask, j],
+                    'output_file': os.path.join(output_root, str(col), f"{name}.png")}
+            if col == PH_COLUMN:
+                task['kind'] = 'ph'
+            else:
+                task.update(kind='parameter', unit=unit_by_sample.get(col, "Unknown"),
+                            limit=limit_by_sample.get(col, np.nan))
+            tasks.append(task)
+
+        columns = list(df.columns)
+        if 'Calcio total, Ca' in columns and 'Sodio total, Na' in columns:
+            ca = values[:, columns.index('Calcio total, Ca') - 1]
+            na = values[:, columns.index('Sodio total, Na') - 1]
+            tasks.append({'station': name, 'title': title, 'kind': 'na_ca',
+                          'dates': dates, 'values': np.vstack([ca, na]),
+                          'output_file': os.path.join(output_root, NA_CA_FOLDER, f"{name}.png")})
+    return tasks
+
+
+def render_all(tasks, output_root='./var', max_workers=None, force=False):
+    """Genera en paralelo los gráficos cuyo contenido cambió desde la última ejecución.
+
+    Los hashes se guardan en output_root/.plot_hashes.json. Devuelve la
+    lista de archivos generados.
+    """
+    manifest_path = os.path.join(output_root, '.plot_hashes.json')
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+
+    hashes = {task['output_file']: task_hash(task) for task in tasks}
+    pending = [task for task in tasks
+               if previous.get(task['output_file']) != hashes[task['output_file']]
+               or not os.path.exists(task['output_file'])]
+
+    # Crear cada carpeta una sola vez antes de repartir el trabajo
+    for folder in {os.path.dirname(task['output_file']) for task in pending}:
+        os.makedirs(folder, exist_ok=True)
+
+    generated = []
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            generated = list(executor.map(render, pending, chunksize=8))
+
+    os.makedirs(output_root, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({**previous, **hashes}, f, ensure_ascii=False, indent=1)
+
+    print(f"{len(generated)} gráficos generados, {len(tasks) - len(pending)} sin cambios.")
+    return generated